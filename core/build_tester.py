@@ -1,20 +1,67 @@
 """Build testing utilities for libraries that require compilation."""
 from __future__ import annotations
 
+import functools
+import heapq
 import json
 import logging
+import os
 import re
+import subprocess
+import time
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
 
-import yaml
-
+from .models import load_libraries_yaml
 from .subprocess_utils import run_ce_install_command
 
-logger = logging.getLogger(__name__)
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # orjson is optional; its JSONDecodeError subclasses json's
+    _json_loads = json.loads
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+# Staging directories created by ce_install: /tmp/ce-cefs-temp/staging/<uuid>
+# Matched against raw bytes so build logs don't need decoding on the success path
+_STAGING_RE = re.compile(rb"/tmp/ce-cefs-temp/staging/[a-f0-9-]+")
+# First three dot-separated fields of a version after any leading 'v's; a field
+# counts only if it is all digits: "v14.2.0" -> 14, 2, 0 and "14.2rc.1" -> 14, 0, 1
+_SEMVER_RE = re.compile(
+    r"v*(?:(\d+)|[^.]*)(?:\.(?:(\d+)|[^.]*))?(?:\.(?:(\d+)|[^.]*))?(?:\..*)?", re.DOTALL
+)
+# Plain-text compiler entries: "gcc 14.2.0 (g142)"
+_COMPILER_ENTRY_RE = re.compile(r"(\w+)\s+([\d.]+)\s+\((\w+)\)")
+
+# Classify an artifact file name by kind in one match; match.lastgroup is the kind.
+# Linkable libraries also capture the link name: libz.a -> z, libz.so.1.3.1 -> z
+_ARTIFACT_KIND_RE = re.compile(
+    r"(?P<linklib>lib(?P<link_name>.+?)\.(?P<link_ext>a|so(?:\.[^/]*)?)$)"
+    r"|(?P<lib>.*(?:\.(?:a|so|rlib)$|\.so\.))"
+    r"|(?P<rust_meta>.*\.rmeta$)"
+    r"|(?P<header>.*\.(?:h|hpp|hxx|hh)$)"
+    r"|(?P<fortran_src>.*\.(?:f90|F90|f|F|f95|F95)$)"
+    r"|(?P<fortran_mod>.*\.mod$)"
+)
+_ARTIFACT_KINDS = ("lib", "rust_meta", "header", "fortran_src", "fortran_mod", "other", "link_name")
+
+# Compiler detection results: (infra_path, family, ce_install mtime) -> (timestamp, compilers)
+_COMPILER_CACHE: dict[tuple[str, str, int], tuple[float, list[InstalledCompiler]]] = {}
+_COMPILER_CACHE_TTL = 60.0
+
+# Link library indexes keyed by libraries.yaml path, with the parsed data they came from
+_LIBRARIES_INDEX_CACHE: dict[str, tuple[object, LibrariesIndex]] = {}
+
+# Cap on artifacts reported from whole staging trees (Fortran, Go)
+_MAX_LISTED_ARTIFACTS = 50
+
+# Compiled artifacts and sources kept from Fortran (FPM) staging trees
+_FORTRAN_EXTS = frozenset((".a", ".mod", ".f90", ".F90", ".f", ".F", ".o", ".toml"))
+
+
+@dataclass(slots=True, frozen=True)
 class InstalledCompiler:
     """Represents an installed compiler."""
 
@@ -26,7 +73,7 @@ class InstalledCompiler:
         return f"{self.name} {self.version} ({self.compiler_id})"
 
 
-@dataclass
+@dataclass(slots=True)
 class BuildTestResult:
     """Result of a build test including artifact information."""
 
@@ -35,44 +82,55 @@ class BuildTestResult:
     compiler_id: str | None = None
     staging_dir: str | None = None
     install_dir: str | None = None
-    artifacts: list[str] = field(default_factory=list)
+    # Error results never fill these in, so the sequences default to empty tuples
+    artifacts: Sequence[str] = ()
     link_verification: dict[str, bool] = field(default_factory=dict)
-    missing_links: list[str] = field(default_factory=list)
+    missing_links: Sequence[str] = ()
+
+    def _classify_artifacts(self) -> dict[str, list[str]]:
+        """Bucket the current artifact file names by kind in a single pass."""
+        kinds: dict[str, list[str]] = {kind: [] for kind in _ARTIFACT_KINDS}
+        for artifact in self.artifacts:
+            name = artifact.rpartition(os.sep)[2]
+            match = _ARTIFACT_KIND_RE.match(name)
+            if match is None:
+                kinds["other"].append(name)
+            elif match.lastgroup == "linklib":
+                kinds["lib"].append(name)
+                kinds["link_name"].append(match["link_name"])
+            else:
+                kinds[match.lastgroup].append(name)
+        return kinds
 
     def get_artifact_summary(self) -> str:
         """Get a human-readable summary of artifacts."""
         if not self.artifacts:
             return "No artifacts found"
 
-        # Categorize artifacts
-        libs = [
-            a for a in self.artifacts if a.endswith((".a", ".so", ".so.*", ".rlib")) or ".so." in a
-        ]
-        rust_meta = [a for a in self.artifacts if a.endswith(".rmeta")]
-        headers = [a for a in self.artifacts if a.endswith((".h", ".hpp", ".hxx", ".hh"))]
-        fortran_src = [
-            a for a in self.artifacts if a.endswith((".f90", ".F90", ".f", ".F", ".f95", ".F95"))
-        ]
-        fortran_mod = [a for a in self.artifacts if a.endswith(".mod")]
-        categorized = set(libs + rust_meta + headers + fortran_src + fortran_mod)
-        others = [a for a in self.artifacts if a not in categorized]
+        kinds = self._classify_artifacts()
+        libs = kinds["lib"]
+        rust_meta = kinds["rust_meta"]
+        headers = kinds["header"]
+        fortran_src = kinds["fortran_src"]
+        fortran_mod = kinds["fortran_mod"]
+        others = kinds["other"]
 
         parts = []
         if libs:
-            parts.append(f"Libraries: {', '.join(Path(lib).name for lib in libs)}")
+            parts.append(f"Libraries: {', '.join(libs)}")
         if rust_meta:
-            parts.append(f"Rust metadata: {', '.join(Path(m).name for m in rust_meta)}")
+            parts.append(f"Rust metadata: {', '.join(rust_meta)}")
         if headers:
-            parts.append(f"Headers: {', '.join(Path(h).name for h in headers)}")
+            parts.append(f"Headers: {', '.join(headers)}")
         if fortran_mod:
-            parts.append(f"Fortran modules: {', '.join(Path(m).name for m in fortran_mod)}")
+            parts.append(f"Fortran modules: {', '.join(fortran_mod)}")
         if fortran_src:
-            src_names = [Path(s).name for s in fortran_src[:5]]
+            src_names = fortran_src[:5]
             if len(fortran_src) > 5:
                 src_names.append(f"... and {len(fortran_src) - 5} more")
             parts.append(f"Fortran sources: {', '.join(src_names)}")
         if others:
-            other_names = [Path(o).name for o in others[:5]]
+            other_names = others[:5]
             if len(others) > 5:
                 other_names.append(f"... and {len(others) - 5} more")
             parts.append(f"Other: {', '.join(other_names)}")
@@ -93,21 +151,11 @@ class BuildTestResult:
 
     def get_linkable_libraries(self) -> list[str]:
         """Extract link names from artifacts (e.g., 'z' from 'libz.a')."""
-        link_names = set()
-        for artifact in self.artifacts:
-            name = Path(artifact).name
-            # Match libXXX.a or libXXX.so
-            if name.startswith("lib") and (name.endswith(".a") or ".so" in name):
-                # Extract the link name (remove 'lib' prefix and extension)
-                base = name[3:]  # Remove 'lib'
-                if base.endswith(".a"):
-                    link_names.add(base[:-2])
-                elif ".so" in base:
-                    # Handle libz.so, libz.so.1, libz.so.1.3.1
-                    link_names.add(base.split(".so")[0])
-        return sorted(link_names)
+        # libXXX.a or libXXX.so, libXXX.so.1, libXXX.so.1.3.1
+        return sorted(set(self._classify_artifacts()["link_name"]))
 
 
+@functools.lru_cache(maxsize=None)
 def parse_semver(version: str) -> tuple[int, int, int]:
     """
     Parse a semantic version string into a tuple for comparison.
@@ -118,25 +166,103 @@ def parse_semver(version: str) -> tuple[int, int, int]:
     Returns:
         Tuple of (major, minor, patch) integers
     """
-    # Remove common prefixes
-    version = version.lstrip("v")
+    # Fields that are not purely numeric count as 0
+    match = _SEMVER_RE.fullmatch(version)
+    return (int(match[1] or 0), int(match[2] or 0), int(match[3] or 0))
 
-    # Split and parse
-    parts = version.split(".")
-    major = int(parts[0]) if len(parts) > 0 and parts[0].isdigit() else 0
-    minor = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
-    patch = int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else 0
 
-    return (major, minor, patch)
+def _parse_dict_compiler_entries(
+    compilers_data: list[dict], compiler_family: str
+) -> list[InstalledCompiler]:
+    """Parse ce_install JSON objects: {"target_name": "14.2.0", "compiler_ids": ["g142", ...]}."""
+    compilers = []
+    for entry in compilers_data:
+        version = entry.get("target_name", "")
+        compiler_ids = entry.get("compiler_ids", [])
+
+        # Skip non-version entries (like "renovated-3.4.6")
+        if not version or not compiler_ids:
+            continue
 
+        # Check if version looks like a semver (starts with digit)
+        if not version[0].isdigit():
+            continue
 
-def detect_installed_compilers(
+        # Use the first compiler_id (primary one, without objcpp prefix)
+        compiler_id = compiler_ids[0]
+        if compiler_id:
+            compilers.append(
+                InstalledCompiler(
+                    name=entry.get("name", compiler_family),
+                    version=version,
+                    compiler_id=compiler_id,
+                )
+            )
+    return compilers
+
+
+def _parse_str_compiler_entries(compilers_data: list[str]) -> list[InstalledCompiler]:
+    """Parse plain-text compiler entries: "gcc 14.2.0 (g142)"."""
+    compilers = []
+    for entry in compilers_data:
+        match = _COMPILER_ENTRY_RE.match(entry)
+        if match:
+            compilers.append(
+                InstalledCompiler(
+                    name=match.group(1),
+                    version=match.group(2),
+                    compiler_id=match.group(3),
+                )
+            )
+    return compilers
+
+
+def _parse_compilers_from_json(
+    compilers_data: list, compiler_family: str
+) -> list[InstalledCompiler]:
+    """
+    Parse ce_install list entries into compilers, keeping the output order.
+
+    ce_install emits a list of a single entry shape, so the shape is checked
+    once on the first entry rather than per entry.
+
+    Args:
+        compilers_data: Decoded JSON list from ce_install list --json
+        compiler_family: Compiler family used as the default name
+
+    Returns:
+        List of installed compilers (unsorted)
+    """
+    if not compilers_data:
+        return []
+    if isinstance(compilers_data[0], dict):
+        return _parse_dict_compiler_entries(compilers_data, compiler_family)
+    if isinstance(compilers_data[0], str):
+        return _parse_str_compiler_entries(compilers_data)
+    return []
+
+
+def clear_compiler_cache() -> None:
+    """Forget cached compiler detection results (e.g., after installing a compiler)."""
+    _COMPILER_CACHE.clear()
+
+
+def _compiler_cache_key(infra_path: Path, compiler_family: str) -> tuple[str, str, int] | None:
+    """Cache key for compiler detection, tied to the ce_install script's mtime."""
+    try:
+        mtime_ns = os.stat(infra_path / "bin" / "ce_install").st_mtime_ns
+    except OSError:
+        return None
+    return (str(infra_path), compiler_family, mtime_ns)
+
+
+def _detect_installed_compilers_unsorted(
     infra_path: Path,
     compiler_family: str = "gcc",
     debug: bool = False,
 ) -> list[InstalledCompiler]:
     """
-    Detect installed compilers using ce_install.
+    Detect installed compilers using ce_install, in ce_install output order.
 
     Args:
         infra_path: Path to the infra repository
@@ -144,8 +270,13 @@ def detect_installed_compilers(
         debug: Enable debug logging
 
     Returns:
-        List of installed compilers sorted by version (newest first)
+        List of installed compilers (unsorted)
     """
+    cache_key = _compiler_cache_key(infra_path, compiler_family)
+    cached = _COMPILER_CACHE.get(cache_key) if cache_key else None
+    if cached and time.monotonic() - cached[0] < _COMPILER_CACHE_TTL:
+        return list(cached[1])
+
     try:
         # Run ce_install list command to get installed compilers
         # Command: bin/ce_install --filter-match-all list --installed-only
@@ -174,68 +305,59 @@ def detect_installed_compilers(
             return []
 
         try:
-            compilers_data = json.loads(output)
+            compilers_data = _json_loads(output)
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse compiler list JSON: {e}")
             if debug:
                 logger.debug(f"Raw output: {output}")
             return []
 
-        # Parse compiler entries
-        # Format from ce_install: list of objects with target_name (version) and compiler_ids
-        compilers = []
-        for entry in compilers_data:
-            if isinstance(entry, dict):
-                # ce_install format: {"target_name": "14.2.0", "compiler_ids": ["g142", ...], ...}
-                version = entry.get("target_name", "")
-                compiler_ids = entry.get("compiler_ids", [])
-                name = entry.get("name", compiler_family)
-
-                # Skip non-version entries (like "renovated-3.4.6")
-                if not version or not compiler_ids:
-                    continue
-
-                # Check if version looks like a semver (starts with digit)
-                if not version[0].isdigit():
-                    continue
-
-                # Use the first compiler_id (primary one, without objcpp prefix)
-                compiler_id = compiler_ids[0] if compiler_ids else ""
-
-                if version and compiler_id:
-                    compilers.append(
-                        InstalledCompiler(name=name, version=version, compiler_id=compiler_id)
-                    )
-            elif isinstance(entry, str):
-                # Try to parse string format: "gcc 14.2.0 (g142)"
-                match = re.match(r"(\w+)\s+([\d.]+)\s+\((\w+)\)", entry)
-                if match:
-                    compilers.append(
-                        InstalledCompiler(
-                            name=match.group(1),
-                            version=match.group(2),
-                            compiler_id=match.group(3),
-                        )
-                    )
-
-        # Sort by version (newest first)
-        compilers.sort(key=lambda c: parse_semver(c.version), reverse=True)
+        compilers = _parse_compilers_from_json(compilers_data, compiler_family)
 
         if compilers:
             logger.info(f"Found {len(compilers)} installed {compiler_family} compiler(s)")
-            if debug:
-                for c in compilers[:5]:
-                    logger.debug(f"  - {c}")
         else:
             logger.warning(f"No installed {compiler_family} compilers found")
 
-        return compilers
+        # An empty result is not cached: installing a compiler doesn't touch
+        # ce_install, so the cache key would not notice it appearing
+        if cache_key and compilers:
+            _COMPILER_CACHE[cache_key] = (time.monotonic(), compilers)
+        return list(compilers)
 
     except Exception as e:
         logger.error(f"Error detecting installed compilers: {e}")
         return []
 
 
+def detect_installed_compilers(
+    infra_path: Path,
+    compiler_family: str = "gcc",
+    debug: bool = False,
+) -> list[InstalledCompiler]:
+    """
+    Detect installed compilers using ce_install.
+
+    Args:
+        infra_path: Path to the infra repository
+        compiler_family: Compiler family to search for (e.g., "gcc", "clang")
+        debug: Enable debug logging
+
+    Returns:
+        List of installed compilers sorted by version (newest first)
+    """
+    compilers = _detect_installed_compilers_unsorted(infra_path, compiler_family, debug)
+
+    # Sort by version (newest first)
+    compilers.sort(key=lambda c: parse_semver(c.version), reverse=True)
+
+    if debug:
+        for c in compilers[:5]:
+            logger.debug(f"  - {c}")
+
+    return compilers
+
+
 def get_latest_compiler(
     infra_path: Path,
     compiler_family: str = "gcc",
@@ -252,17 +374,55 @@ def get_latest_compiler(
     Returns:
         The latest installed compiler, or None if none found
     """
-    compilers = detect_installed_compilers(infra_path, compiler_family, debug)
-    return compilers[0] if compilers else None
+    compilers = _detect_installed_compilers_unsorted(infra_path, compiler_family, debug)
+    # Single O(N) pass; no need to sort just to take the newest
+    return max(compilers, key=lambda c: parse_semver(c.version), default=None)
+
+
+def _find_staging_dirs(*outputs: bytes) -> list[str]:
+    """Extract staging directory paths from raw build output streams (e.g. stdout, stderr)."""
+    # Return unique paths in order of first appearance
+    matches = dict.fromkeys(match for output in outputs for match in _STAGING_RE.findall(output))
+    return [match.decode() for match in matches]
 
 
-def _find_staging_dirs(output: str) -> list[str]:
-    """Extract staging directory paths from build output."""
-    # Pattern: /tmp/ce-cefs-temp/staging/<uuid>
-    pattern = r"/tmp/ce-cefs-temp/staging/[a-f0-9-]+"
-    matches = re.findall(pattern, output)
-    # Return unique paths
-    return list(set(matches))
+def _decode_build_output(result: subprocess.CompletedProcess) -> str:
+    """Decode and merge the stdout/stderr of a ce_install run made with text=False."""
+    stdout = result.stdout.decode(errors="replace")
+    stderr = result.stderr.decode(errors="replace")
+    return f"{stdout}\n{stderr}".strip()
+
+
+def _iter_relative_files(root: Path, extensions: frozenset[str] | None = None) -> Iterator[str]:
+    """
+    Yield paths of files under root, relative to root, without building Path objects.
+
+    Args:
+        root: Directory to walk
+        extensions: If given, only yield files whose extension (e.g. ".mod") is in this set
+    """
+    # Walk with scandir and slice off the root prefix to get relative paths.
+    # DirEntry type checks use the cached d_type, and the name filter runs before
+    # is_file() so only matching symlinks ever need a stat call.
+    top = str(root)
+    prefix_len = len(top) + 1
+    stack = [top]
+    while stack:
+        directory = stack.pop()
+        try:
+            it = os.scandir(directory)
+        except OSError as e:
+            # Like Path.rglob, skip directories that can't be listed
+            logger.debug(f"Skipping unreadable directory {directory}: {e}")
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif (
+                    extensions is None or os.path.splitext(entry.name)[1] in extensions
+                ) and entry.is_file():  # Keep symlinked libs like libz.so -> libz.so.1
+                    yield entry.path[prefix_len:]
 
 
 def _list_artifacts(install_dir: Path) -> list[str]:
@@ -270,12 +430,90 @@ def _list_artifacts(install_dir: Path) -> list[str]:
     if not install_dir.exists():
         return []
 
-    artifacts = []
-    for f in install_dir.rglob("*"):
-        if f.is_file():
-            # Get path relative to install dir
-            artifacts.append(str(f.relative_to(install_dir)))
-    return sorted(artifacts)
+    artifacts = list(_iter_relative_files(install_dir))
+    artifacts.sort()
+    return artifacts
+
+
+class LibrariesIndex:
+    """Precomputed (language, library_id) -> link libraries lookup for libraries.yaml."""
+
+    __slots__ = ("has_libraries", "languages", "_links")
+
+    def __init__(self, data: dict | None):
+        libraries = data.get("libraries") if isinstance(data, dict) else None
+        self.has_libraries = libraries is not None
+        self.languages: set[str] = set()
+        self._links: dict[tuple[str, str], tuple[list[str], list[str]]] = {}
+
+        if not isinstance(libraries, dict):
+            return
+
+        for language, lang_libs in libraries.items():
+            self.languages.add(language)
+            if not isinstance(lang_libs, dict):
+                continue
+            for library_id, lib_config in lang_libs.items():
+                if not isinstance(lib_config, dict):
+                    continue
+                static_links = lib_config.get("staticliblink", [])
+                shared_links = lib_config.get("sharedliblink", [])
+
+                # Ensure they're lists
+                if isinstance(static_links, str):
+                    static_links = [static_links]
+                if isinstance(shared_links, str):
+                    shared_links = [shared_links]
+
+                self._links[(language, library_id)] = (static_links, shared_links)
+
+    def get_link_libraries(
+        self, language: str, library_id: str
+    ) -> tuple[list[str], list[str]] | None:
+        """Return (static_links, shared_links) for a library, or None if unknown."""
+        links = self._links.get((language, library_id))
+        if links is None:
+            return None
+        return list(links[0]), list(links[1])
+
+
+def _get_libraries_index(libraries_yaml: Path) -> LibrariesIndex | None:
+    """Get the index for libraries.yaml, or None if the file is missing."""
+    try:
+        data = load_libraries_yaml(libraries_yaml)
+    except FileNotFoundError:
+        return None
+
+    # load_libraries_yaml hands back the same object until the file changes,
+    # so the index is rebuilt only when the parsed data is new
+    key = str(libraries_yaml)
+    cached = _LIBRARIES_INDEX_CACHE.get(key)
+    if cached is not None and cached[0] is data:
+        return cached[1]
+
+    index = LibrariesIndex(data)
+    _LIBRARIES_INDEX_CACHE[key] = (data, index)
+    return index
+
+
+def prime_libraries_yaml(infra_path: Path) -> bool:
+    """
+    Parse and index libraries.yaml ahead of time.
+
+    Intended for batch drivers that run many build tests against the same infra
+    checkout, so that each test only does a cached lookup.
+
+    Args:
+        infra_path: Path to the infra repository
+
+    Returns:
+        True if libraries.yaml was found and loaded, False otherwise
+    """
+    try:
+        return _get_libraries_index(infra_path / "bin" / "yaml" / "libraries.yaml") is not None
+    except Exception as e:
+        logger.warning(f"Error reading libraries.yaml: {e}")
+        return False
 
 
 def _get_expected_link_libraries(
@@ -293,41 +531,29 @@ def _get_expected_link_libraries(
         Tuple of (static_links, shared_links) - lists of expected link library names
     """
     libraries_yaml = infra_path / "bin" / "yaml" / "libraries.yaml"
-    if not libraries_yaml.exists():
-        logger.warning(f"libraries.yaml not found at {libraries_yaml}")
-        return [], []
 
     try:
-        with open(libraries_yaml) as f:
-            data = yaml.safe_load(f)
+        index = _get_libraries_index(libraries_yaml)
+        if index is None:
+            logger.warning(f"libraries.yaml not found at {libraries_yaml}")
+            return [], []
 
-        # Navigate to the library section (structure: libraries -> language -> library)
-        if "libraries" not in data:
+        # Structure is: libraries -> language -> library
+        if not index.has_libraries:
             logger.warning("'libraries' key not found in libraries.yaml")
             return [], []
 
-        libraries = data["libraries"]
         lang_key = "c++" if language == "c++" else language
-        if lang_key not in libraries:
+        if lang_key not in index.languages:
             logger.warning(f"Language '{lang_key}' not found in libraries.yaml")
             return [], []
 
-        lang_libs = libraries[lang_key]
-        if library_id not in lang_libs:
+        links = index.get_link_libraries(lang_key, library_id)
+        if links is None:
             logger.warning(f"Library '{library_id}' not found in libraries.yaml")
             return [], []
 
-        lib_config = lang_libs[library_id]
-        static_links = lib_config.get("staticliblink", [])
-        shared_links = lib_config.get("sharedliblink", [])
-
-        # Ensure they're lists
-        if isinstance(static_links, str):
-            static_links = [static_links]
-        if isinstance(shared_links, str):
-            shared_links = [shared_links]
-
-        return static_links, shared_links
+        return links
 
     except Exception as e:
         logger.warning(f"Error reading libraries.yaml: {e}")
@@ -349,34 +575,19 @@ def _verify_link_libraries(
         Tuple of (verification_dict, missing_links)
     """
     # Extract library names from artifacts
-    artifact_libs = set()
+    static_libs: set[str] = set()
+    shared_libs: set[str] = set()
     for artifact in artifacts:
-        name = Path(artifact).name
-        if name.startswith("lib"):
-            if name.endswith(".a"):
-                # Static lib: libz.a -> z
-                artifact_libs.add(("static", name[3:-2]))
-            elif ".so" in name:
-                # Shared lib: libz.so -> z
-                base = name[3:].split(".so")[0]
-                artifact_libs.add(("shared", base))
-
-    verification = {}
-    missing = []
-
-    # Check static libraries
-    for link in static_links:
-        found = ("static", link) in artifact_libs
-        verification[f"{link} (static)"] = found
-        if not found:
-            missing.append(f"lib{link}.a")
-
-    # Check shared libraries
-    for link in shared_links:
-        found = ("shared", link) in artifact_libs
-        verification[f"{link} (shared)"] = found
-        if not found:
-            missing.append(f"lib{link}.so")
+        match = _ARTIFACT_KIND_RE.match(artifact.rpartition(os.sep)[2])
+        if match and match.lastgroup == "linklib":
+            # Static lib: libz.a -> z, shared lib: libz.so.1 -> z
+            (static_libs if match["link_ext"] == "a" else shared_libs).add(match["link_name"])
+
+    verification = {f"{link} (static)": link in static_libs for link in static_links}
+    verification.update({f"{link} (shared)": link in shared_libs for link in shared_links})
+
+    missing = [f"lib{link}.a" for link in static_links if link not in static_libs]
+    missing.extend(f"lib{link}.so" for link in shared_links if link not in shared_libs)
 
     return verification, missing
 
@@ -440,11 +651,10 @@ def run_build_test(
         logger.info(f"Running build test for {library_id} {version} with {compiler_id}...")
         logger.info(f"Command: bin/ce_install {' '.join(subcommand)}")
 
-        result = run_ce_install_command(subcommand, cwd=infra_path, debug=debug)
-
-        output = f"{result.stdout}\n{result.stderr}".strip()
+        result = run_ce_install_command(subcommand, cwd=infra_path, debug=debug, text=False)
 
         if result.returncode != 0:
+            output = _decode_build_output(result)
             logger.error(f"Build test failed with exit code {result.returncode}")
             if debug:
                 logger.debug(f"Output: {output}")
@@ -455,7 +665,7 @@ def run_build_test(
             )
 
         # Parse staging directories from output
-        staging_dirs = _find_staging_dirs(output)
+        staging_dirs = _find_staging_dirs(result.stdout, result.stderr)
         staging_dir = staging_dirs[0] if staging_dirs else None
         install_dir = None
         artifacts: list[str] = []
@@ -513,13 +723,17 @@ def check_build_test_available(infra_path: Path, debug: bool = False) -> tuple[b
     Returns:
         Tuple of (available, message)
     """
-    # Check for GCC first (most common)
-    gcc_compiler = get_latest_compiler(infra_path, "gcc", debug)
+    # Query both families at once; each call is mostly waiting on a ce_install subprocess
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        gcc_future = executor.submit(get_latest_compiler, infra_path, "gcc", debug)
+        clang_future = executor.submit(get_latest_compiler, infra_path, "clang", debug)
+        gcc_compiler = gcc_future.result()
+        clang_compiler = clang_future.result()
+
+    # Prefer GCC (most common), with Clang as fallback
     if gcc_compiler:
         return (True, f"Build testing available with {gcc_compiler}")
 
-    # Check for Clang as fallback
-    clang_compiler = get_latest_compiler(infra_path, "clang", debug)
     if clang_compiler:
         return (True, f"Build testing available with {clang_compiler}")
 
@@ -573,7 +787,7 @@ def detect_installed_rust_compilers(
             return []
 
         try:
-            compilers_data = json.loads(output)
+            compilers_data = _json_loads(output)
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse compiler list JSON: {e}")
             return []
@@ -729,11 +943,10 @@ def run_rust_build_test(
         logger.info(f"Running Rust build test for {crate_name} {version} with {compiler_id}...")
         logger.info(f"Command: bin/ce_install {' '.join(subcommand)}")
 
-        result = run_ce_install_command(subcommand, cwd=infra_path, debug=debug)
-
-        output = f"{result.stdout}\n{result.stderr}".strip()
+        result = run_ce_install_command(subcommand, cwd=infra_path, debug=debug, text=False)
 
         if result.returncode != 0:
+            output = _decode_build_output(result)
             logger.error(f"Rust build test failed with exit code {result.returncode}")
             if debug:
                 logger.debug(f"Output: {output}")
@@ -744,7 +957,7 @@ def run_rust_build_test(
             )
 
         # Parse staging directories from output
-        staging_dirs = _find_staging_dirs(output)
+        staging_dirs = _find_staging_dirs(result.stdout, result.stderr)
         build_dir, artifacts = _find_rust_artifacts(staging_dirs, compiler_id)
 
         # Check for .rlib files specifically
@@ -855,7 +1068,7 @@ def detect_installed_fortran_compilers(
             output = result.stdout.strip()
             if output:
                 try:
-                    compilers_data = json.loads(output)
+                    compilers_data = _json_loads(output)
                     for entry in compilers_data:
                         if isinstance(entry, dict):
                             if entry.get("is_library", False):
@@ -892,6 +1105,22 @@ def detect_installed_fortran_compilers(
     return compilers
 
 
+def _fortran_compiler_rank(compiler: InstalledCompiler) -> tuple[int, tuple[int, int, int]]:
+    """
+    Rank a Fortran compiler for selection with max().
+
+    gfortran (from gcc) ranks highest, then LFortran, each newest version first.
+    Any other compiler (e.g., Intel) ranks equally, so max() falls back to the
+    first one detected.
+    """
+    name = compiler.name.lower()
+    if "gfortran" in name:
+        return (2, parse_semver(compiler.version))
+    if "lfortran" in name:
+        return (1, parse_semver(compiler.version))
+    return (0, (0, 0, 0))
+
+
 def get_latest_fortran_compiler(
     infra_path: Path,
     debug: bool = False,
@@ -912,24 +1141,7 @@ def get_latest_fortran_compiler(
         The latest installed Fortran compiler, or None if none found
     """
     compilers = detect_installed_fortran_compilers(infra_path, debug)
-    if not compilers:
-        return None
-
-    # Prefer gfortran (usually from gcc installations)
-    gfortran_compilers = [c for c in compilers if "gfortran" in c.name.lower()]
-    if gfortran_compilers:
-        # Sort by version and return the latest
-        gfortran_compilers.sort(key=lambda c: parse_semver(c.version), reverse=True)
-        return gfortran_compilers[0]
-
-    # Next, prefer LFortran
-    lfortran_compilers = [c for c in compilers if "lfortran" in c.name.lower()]
-    if lfortran_compilers:
-        lfortran_compilers.sort(key=lambda c: parse_semver(c.version), reverse=True)
-        return lfortran_compilers[0]
-
-    # Fall back to any available Fortran compiler (e.g., Intel)
-    return compilers[0]
+    return max(compilers, key=_fortran_compiler_rank, default=None)
 
 
 def run_fortran_build_test(
@@ -990,13 +1202,12 @@ def run_fortran_build_test(
         logger.info(f"Running Fortran build test for {library_id} {version}...")
         logger.info(f"Command: bin/ce_install {' '.join(subcommand)}")
 
-        result = run_ce_install_command(subcommand, cwd=infra_path, debug=debug)
-
-        output = f"{result.stdout}\n{result.stderr}".strip()
+        result = run_ce_install_command(subcommand, cwd=infra_path, debug=debug, text=False)
 
         # Check for success - fpm libraries may fail at deployment stage (permission error)
         # but that's OK for testing purposes - we just want to verify the source is valid
         if result.returncode != 0:
+            output = _decode_build_output(result)
             # Check if it failed at deployment stage (permission error is expected)
             if "PermissionError" in output and "cefs-images" in output:
                 logger.info("Build completed but deployment failed (expected in test mode)")
@@ -1011,7 +1222,7 @@ def run_fortran_build_test(
                 )
 
         # Parse staging directories from output
-        staging_dirs = _find_staging_dirs(output)
+        staging_dirs = _find_staging_dirs(result.stdout, result.stderr)
         staging_dir = staging_dirs[0] if staging_dirs else None
         artifacts: list[str] = []
 
@@ -1019,17 +1230,10 @@ def run_fortran_build_test(
             # FPM libraries produce compiled artifacts: .a (static libs), .mod (module files)
             staging_path = Path(staging_dir)
             if staging_path.exists():
-                for f in staging_path.rglob("*"):
-                    if f.is_file():
-                        rel_path = str(f.relative_to(staging_path))
-                        # Include compiled artifacts and source files
-                        if any(
-                            rel_path.endswith(ext)
-                            for ext in (".a", ".mod", ".f90", ".F90", ".f", ".F", ".o", ".toml")
-                        ):
-                            artifacts.append(rel_path)
-
-                artifacts = sorted(artifacts)[:50]  # Limit to 50 artifacts
+                # Include compiled artifacts and source files, keeping only the first few
+                artifacts = heapq.nsmallest(
+                    _MAX_LISTED_ARTIFACTS, _iter_relative_files(staging_path, _FORTRAN_EXTS)
+                )
                 logger.info(f"Found {len(artifacts)} build artifacts")
 
         logger.info("Fortran build test completed successfully")
@@ -1114,7 +1318,7 @@ def detect_installed_go_compilers(
             return []
 
         try:
-            compilers_data = json.loads(output)
+            compilers_data = _json_loads(output)
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse compiler list JSON: {e}")
             return []
@@ -1234,11 +1438,10 @@ def run_go_build_test(
         logger.info(f"Running Go build test for {library_id} {version} with {compiler_id}...")
         logger.info(f"Command: bin/ce_install {' '.join(subcommand)}")
 
-        result = run_ce_install_command(subcommand, cwd=infra_path, debug=debug)
-
-        output = f"{result.stdout}\n{result.stderr}".strip()
+        result = run_ce_install_command(subcommand, cwd=infra_path, debug=debug, text=False)
 
         if result.returncode != 0:
+            output = _decode_build_output(result)
             # Check if it failed at deployment stage (permission error is expected)
             if "PermissionError" in output and "cefs-images" in output:
                 logger.info("Build completed but deployment failed (expected in test mode)")
@@ -1253,19 +1456,16 @@ def run_go_build_test(
                 )
 
         # Parse staging directories from output
-        staging_dirs = _find_staging_dirs(output)
+        staging_dirs = _find_staging_dirs(result.stdout, result.stderr)
         staging_dir = staging_dirs[0] if staging_dirs else None
         artifacts: list[str] = []
 
         if staging_dir:
             staging_path = Path(staging_dir)
             if staging_path.exists():
-                for f in staging_path.rglob("*"):
-                    if f.is_file():
-                        rel_path = str(f.relative_to(staging_path))
-                        artifacts.append(rel_path)
-
-                artifacts = sorted(artifacts)[:50]
+                artifacts = heapq.nsmallest(
+                    _MAX_LISTED_ARTIFACTS, _iter_relative_files(staging_path)
+                )
                 logger.info(f"Found {len(artifacts)} build artifacts")
 
         logger.info("Go build test completed successfully")
@@ -2,6 +2,8 @@
 from __future__ import annotations
 
 import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from .build_tester import BuildTestResult, check_build_test_available, run_build_test
@@ -11,6 +13,8 @@ from .library_utils import (
     clone_and_analyze_repository,
     detect_library_type_from_analysis,
     get_link_targets_from_analysis,
+    is_valid_library_id,
+    read_properties_paths,
     suggest_library_id_from_github_url,
 )
 from .library_utils import (
@@ -21,6 +25,19 @@ from .subprocess_utils import run_ce_install_command
 
 logger = logging.getLogger(__name__)
 
+# Output formats of `cpp-library add` that carry the resulting library ID,
+# combined so the output is scanned once; only one named group ever matches.
+# Matched against raw bytes so only the captured ID needs decoding.
+_LIBRARY_ID_RE = re.compile(
+    rb"Added version .+ to library (?P<added>\S+)"
+    rb"|Library '(?P<available>[^']+)' is now available"
+    rb"|--library (?P<flag>\S+)"
+    rb"|Found existing library '(?P<existing>[^']+)'"
+)
+
+# Destination line printed by `ce_install list-paths` for C libraries (bytes)
+_LIST_PATHS_RE = re.compile(rb"libraries/c/\S+\s+\S+:\s+(.+)")
+
 
 class CHandler:
     """Handles C library additions to Compiler Explorer infrastructure."""
@@ -115,31 +132,21 @@ class CHandler:
             link_support = check_ce_install_link_support(self.infra_path)
             subcommand = build_ce_install_command(config, "cshared", link_targets, link_support)
 
-            result = run_ce_install_command(subcommand, cwd=self.infra_path, debug=self.debug)
+            result = run_ce_install_command(
+                subcommand, cwd=self.infra_path, debug=self.debug, text=False
+            )
 
             if result.returncode != 0:
-                error_output = f"{result.stdout} {result.stderr}".strip()
+                error_output = (
+                    f"{result.stdout.decode(errors='replace')} "
+                    f"{result.stderr.decode(errors='replace')}"
+                ).strip()
                 logger.error(f"cpp-library add failed: {error_output}")
                 return None
 
             # Parse the output to get the library ID
-            output = result.stdout.strip()
-
-            import re
-
-            patterns = [
-                r"Added version .+ to library (\\S+)",
-                r"Library '([^']+)' is now available",
-                r"--library (\\S+)",
-                r"Found existing library '([^']+)'",
-            ]
-
-            library_id = None
-            for pattern in patterns:
-                match = re.search(pattern, output)
-                if match:
-                    library_id = match.group(1)
-                    break
+            match = _LIBRARY_ID_RE.search(result.stdout)
+            library_id = match.group(match.lastgroup).decode() if match else None
 
             if library_id:
                 logger.info(f"Successfully added C shared library with ID: {library_id}")
@@ -169,61 +176,42 @@ class CHandler:
                 logger.error("Main repository path not provided")
                 return False
 
-            # Generate C++ properties first
-            cpp_props_file = self.main_path / "etc" / "config" / "c++.amazon.properties"
-            subcommand_cpp = [
-                "cpp-library",
-                "generate-linux-props",
-                "--input-file",
-                str(cpp_props_file),
-                "--output-file",
-                str(cpp_props_file),
-                "--library",
-                library_id,
-                "--version",
-                version,
-            ]
-
-            result = run_ce_install_command(subcommand_cpp, cwd=self.infra_path, debug=self.debug)
+            # The C++, C and Windows generations are independent ce_install runs
+            # (each writes its own file), so run them concurrently.
+            config_dir = self.main_path / "etc" / "config"
+            subcommand_cpp = self._linux_props_subcommand(
+                config_dir / "c++.amazon.properties", library_id, version
+            )
+            subcommand_c = self._linux_props_subcommand(
+                config_dir / "c.amazon.properties", library_id, version
+            )
+            subcommand_windows = ["cpp-library", "generate-windows-props"]
 
-            if result.returncode != 0:
-                logger.error(f"generate-linux-props for C++ failed: {result.stderr}")
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                cpp_future, c_future, windows_future = (
+                    executor.submit(
+                        run_ce_install_command, subcommand, cwd=self.infra_path, debug=self.debug
+                    )
+                    for subcommand in (subcommand_cpp, subcommand_c, subcommand_windows)
+                )
+                cpp_result = cpp_future.result()
+                c_result = c_future.result()
+                windows_result = windows_future.result()
+
+            if cpp_result.returncode != 0:
+                logger.error(f"generate-linux-props for C++ failed: {cpp_result.stderr}")
                 return False
 
             logger.info("Successfully generated Linux C++ properties")
 
-            # Generate C properties
-            c_props_file = self.main_path / "etc" / "config" / "c.amazon.properties"
-            subcommand_c = [
-                "cpp-library",
-                "generate-linux-props",
-                "--input-file",
-                str(c_props_file),
-                "--output-file",
-                str(c_props_file),
-                "--library",
-                library_id,
-                "--version",
-                version,
-            ]
-
-            result = run_ce_install_command(subcommand_c, cwd=self.infra_path, debug=self.debug)
-
-            if result.returncode != 0:
-                logger.error(f"generate-linux-props for C failed: {result.stderr}")
+            if c_result.returncode != 0:
+                logger.error(f"generate-linux-props for C failed: {c_result.stderr}")
                 return False
 
             logger.info("Successfully generated Linux C properties")
 
-            # Also generate Windows properties
-            subcommand_windows = ["cpp-library", "generate-windows-props"]
-
-            result = run_ce_install_command(
-                subcommand_windows, cwd=self.infra_path, debug=self.debug
-            )
-
-            if result.returncode != 0:
-                logger.error(f"generate-windows-props failed: {result.stderr}")
+            if windows_result.returncode != 0:
+                logger.error(f"generate-windows-props failed: {windows_result.stderr}")
                 # Don't fail if Windows props generation fails
                 logger.warning("Windows properties generation failed, but continuing...")
 
@@ -233,6 +221,22 @@ class CHandler:
             logger.error(f"Error generating C properties: {e}")
             return False
 
+    @staticmethod
+    def _linux_props_subcommand(props_file: Path, library_id: str, version: str) -> list[str]:
+        """Build the generate-linux-props subcommand that updates props_file in place."""
+        return [
+            "cpp-library",
+            "generate-linux-props",
+            "--input-file",
+            str(props_file),
+            "--output-file",
+            str(props_file),
+            "--library",
+            library_id,
+            "--version",
+            version,
+        ]
+
     def validate_library_id(self, library_id: str) -> bool:
         """Instance method that calls the static method"""
         return self.validate_library_id_static(library_id)
@@ -248,12 +252,9 @@ class CHandler:
         Returns:
             True if valid, False otherwise
         """
-        import re
-
         # Must be lowercase letters, numbers, and underscores only
         # Must start with a letter
-        pattern = r"^[a-z][a-z0-9_]*$"
-        return bool(re.match(pattern, library_id))
+        return is_valid_library_id(library_id)
 
     def suggest_library_id(self, github_url: str) -> str:
         """Instance method that calls the static method"""
@@ -283,36 +284,35 @@ class CHandler:
         Returns:
             True if paths are consistent with properties, False otherwise
         """
-        import re
-
         try:
             logger.info(f"Checking paths for {library_id} {version}...")
             install_spec = f"{library_id} {version}"
 
             result = run_ce_install_command(
-                ["list-paths", install_spec], cwd=self.infra_path, debug=self.debug
+                ["list-paths", install_spec], cwd=self.infra_path, debug=self.debug, text=False
             )
 
             if result.returncode != 0:
-                logger.error(f"Path check failed: {result.stderr}")
+                logger.error(f"Path check failed: {result.stderr.decode(errors='replace')}")
                 return False
 
-            # Parse the output from list-paths
-            output = result.stdout + result.stderr
-
-            if self.debug:
+            if self.debug and logger.isEnabledFor(logging.DEBUG):
+                output = (result.stdout + result.stderr).decode(errors="replace")
                 logger.debug(f"list-paths output: {output}")
 
             # Look for the destination path in the output
             destination_path = None
 
-            # Try to parse the list-paths output format
-            list_paths_pattern = r"libraries/c/\\S+\\s+\\S+:\\s+(.+)"
-            list_match = re.search(list_paths_pattern, output)
+            # Try to parse the list-paths output format, stdout first
+            list_match = None
+            for output in (result.stdout, result.stderr):
+                list_match = _LIST_PATHS_RE.search(output)
+                if list_match:
+                    break
 
             if list_match:
-                relative_path = list_match.group(1).strip()
-                destination_path = f"/opt/compiler-explorer/{relative_path}"
+                relative_path = list_match.group(1).decode().strip()
+                destination_path = f"/opt/compiler-explorer/{relative_path}".rstrip("/")
                 logger.info(f"Library destination path: {destination_path}")
             else:
                 logger.warning("Could not parse destination path from list-paths output")
@@ -327,22 +327,24 @@ class CHandler:
                 ]
 
                 for props_file in props_files:
-                    if props_file.exists():
-                        props_content = props_file.read_text()
-                        if destination_path not in props_content:
-                            logger.error(
-                                f"Inconsistency detected: Destination path "
-                                f"'{destination_path}' not found in {props_file.name}"
-                            )
-                            logger.error(
-                                "This suggests the properties file and library "
-                                "configuration are out of sync"
-                            )
-                            return False
-                    else:
+                    try:
+                        props_paths = read_properties_paths(props_file)
+                    except FileNotFoundError:
                         logger.warning(
                             f"Properties file {props_file.name} not found for verification"
                         )
+                        continue
+
+                    if destination_path not in props_paths:
+                        logger.error(
+                            f"Inconsistency detected: Destination path "
+                            f"'{destination_path}' not found in {props_file.name}"
+                        )
+                        logger.error(
+                            "This suggests the properties file and library "
+                            "configuration are out of sync"
+                        )
+                        return False
 
             logger.info("Path check succeeded")
             return True
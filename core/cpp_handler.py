@@ -1,17 +1,29 @@
 """Handle C++ library additions to Compiler Explorer."""
 from __future__ import annotations
 
+import functools
 import logging
 import re
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from .build_tester import BuildTestResult, check_build_test_available, run_build_test
+from .build_tester import (
+    BuildTestResult,
+    check_build_test_available,
+    clear_compiler_cache,
+    run_build_test,
+)
 from .library_utils import (
     build_ce_install_command,
     check_ce_install_link_support,
     clone_and_analyze_repository,
     detect_library_type_from_analysis,
     get_link_targets_from_analysis,
+    is_valid_library_id,
+    read_properties_lines,
+    read_properties_paths,
     suggest_library_id_from_github_url,
 )
 from .library_utils import (
@@ -23,10 +35,41 @@ from .models import (
     check_existing_library_config,
     check_existing_library_config_remote,
 )
-from .subprocess_utils import run_ce_install_command
+from .subprocess_utils import run_ce_install_command, run_ce_install_command_streaming
 
 logger = logging.getLogger(__name__)
 
+# Output formats of `cpp-library add` that carry the resulting library ID,
+# combined so the output is scanned once; only one named group ever matches.
+# ce_install output is ASCII, so \s and \S are matched in ASCII mode.
+_LIBRARY_ID_RE = re.compile(
+    r"Added version .+ to library (?P<added>\S+)"
+    r"|Library '(?P<available>[^']+)' is now available"
+    r"|--library (?P<flag>\S+)"
+    r"|Found existing library '(?P<existing>[^']+)'",
+    re.ASCII,
+)
+
+# Staging move message printed by `ce_install install`
+_STAGING_RE = re.compile(r"Moving from staging \((.*?)\) to final destination \((.*?)\)")
+
+# Lines of `ce_install install` output kept for the failure message
+_INSTALL_OUTPUT_TAIL_LINES = 20
+
+# Destination line printed by `ce_install list-paths` for C++ libraries
+_LIST_PATHS_RE = re.compile(r"libraries/c\+\+/\S+\s+\S+:\s+(.+)", re.ASCII)
+
+
+def _search_output(
+    pattern: re.Pattern[str], result: subprocess.CompletedProcess
+) -> re.Match[str] | None:
+    """Search a command's stdout, then its stderr, without concatenating them."""
+    for output in (result.stdout, result.stderr):
+        match = pattern.search(output)
+        if match:
+            return match
+    return None
+
 
 class CppHandler:
     """Handles C++ library additions to Compiler Explorer infrastructure."""
@@ -48,6 +91,14 @@ class CppHandler:
         """Ensure ce_install is available"""
         return setup_ce_install_shared(self.infra_path, self.debug)
 
+    @functools.cached_property
+    def has_local_libraries_yaml(self) -> bool:
+        """Whether the local infra checkout has libraries.yaml (checked once per handler)"""
+        return (
+            bool(self.infra_path)
+            and (self.infra_path / "bin" / "yaml" / "libraries.yaml").is_file()
+        )
+
     def detect_library_type(
         self, github_url: str, library_id: str | None = None
     ) -> tuple[bool, LibraryType | None, list[str] | None]:
@@ -58,24 +109,25 @@ class CppHandler:
         Returns:
             Tuple of (is_valid, library_type, cmake_targets)
         """
-        # First check if library already exists and use its configuration
-        existing_config = None
-        if (
-            library_id
-            and hasattr(self, "infra_path")
-            and self.infra_path
-            and self.infra_path.exists()
-            and (self.infra_path / "bin" / "yaml" / "libraries.yaml").exists()
-        ):
-            # We have the infra repo locally with libraries.yaml
-            existing_config = check_existing_library_config(github_url, library_id, self.infra_path)
-        elif library_id:
-            # We don't have the repo yet (interactive mode), check remotely
-            logger.info(f"Checking for existing configuration of {library_id}...")
-            existing_config = check_existing_library_config_remote(github_url, library_id)
-
-        # Clone and analyze the repository
-        success, analysis = clone_and_analyze_repository(github_url)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # Clone and analyze the repository in the background; it doesn't depend
+            # on the existing configuration lookup, which may clone infra remotely
+            analysis_future = executor.submit(clone_and_analyze_repository, github_url)
+
+            # First check if library already exists and use its configuration
+            existing_config = None
+            if library_id and self.has_local_libraries_yaml:
+                # We have the infra repo locally with libraries.yaml
+                existing_config = check_existing_library_config(
+                    github_url, library_id, self.infra_path
+                )
+            elif library_id:
+                # We don't have the repo yet (interactive mode), check remotely
+                logger.info(f"Checking for existing configuration of {library_id}...")
+                existing_config = check_existing_library_config_remote(github_url, library_id)
+
+            success, analysis = analysis_future.result()
+
         if not success:
             return False, None, None
 
@@ -102,12 +154,13 @@ class CppHandler:
         try:
             # Initialize subcommand
             subcommand = None
+            github_url = str(config.github_url)
 
             # For shared/static libraries, detect CMake targets and add them if supported
             if config.library_type in [LibraryType.SHARED, LibraryType.STATIC, LibraryType.CSHARED]:
                 logger.info("Detecting CMake targets for link configuration...")
                 # Clone and analyze repository for link targets
-                success, analysis = clone_and_analyze_repository(str(config.github_url))
+                success, analysis = clone_and_analyze_repository(github_url)
 
                 if success:
                     link_targets = get_link_targets_from_analysis(
@@ -146,29 +199,17 @@ class CppHandler:
                 logger.error(f"cpp-library add failed: {error_output}")
                 return None
 
-            # Parse the output to get the library ID
-            output = result.stdout.strip()
+            # Parse the output to get the library ID; the patterns don't need it stripped
+            output = result.stdout
 
             # Look for the library ID in the output
             # Possible formats:
             # - "Added version X to library <library_id>"
             # - "Library '<library_id>' is now available"
             # - "--library <library_id>"
-
-            # Try multiple patterns
-            patterns = [
-                r"Added version .+ to library (\S+)",
-                r"Library '([^']+)' is now available",
-                r"--library (\S+)",
-                r"Found existing library '([^']+)'",
-            ]
-
-            library_id = None
-            for pattern in patterns:
-                match = re.search(pattern, output)
-                if match:
-                    library_id = match.group(1)
-                    break
+            # - "Found existing library '<library_id>'"
+            match = _LIBRARY_ID_RE.search(output)
+            library_id = match.group(match.lastgroup) if match else None
 
             if library_id:
                 logger.info(f"Successfully added C++ library with ID: {library_id}")
@@ -178,7 +219,7 @@ class CppHandler:
                 # Debug: Check what was actually written to libraries.yaml
                 try:
                     existing_config = check_existing_library_config(
-                        str(config.github_url), library_id, self.infra_path
+                        github_url, library_id, self.infra_path
                     )
                     if existing_config:
                         logger.info(f"Library config in libraries.yaml: {existing_config}")
@@ -229,23 +270,30 @@ class CppHandler:
                 version,
             ]
 
-            result = run_ce_install_command(subcommand_linux, cwd=self.infra_path, debug=self.debug)
+            # Also generate Windows properties; the two runs are independent
+            subcommand_windows = ["cpp-library", "generate-windows-props"]
 
-            if result.returncode != 0:
-                logger.error(f"generate-linux-props failed: {result.stderr}")
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                linux_future = executor.submit(
+                    run_ce_install_command, subcommand_linux, cwd=self.infra_path, debug=self.debug
+                )
+                windows_future = executor.submit(
+                    run_ce_install_command,
+                    subcommand_windows,
+                    cwd=self.infra_path,
+                    debug=self.debug,
+                )
+                linux_result = linux_future.result()
+                windows_result = windows_future.result()
+
+            if linux_result.returncode != 0:
+                logger.error(f"generate-linux-props failed: {linux_result.stderr}")
                 return False
 
             logger.info("Successfully generated Linux C++ properties")
 
-            # Also generate Windows properties
-            subcommand_windows = ["cpp-library", "generate-windows-props"]
-
-            result = run_ce_install_command(
-                subcommand_windows, cwd=self.infra_path, debug=self.debug
-            )
-
-            if result.returncode != 0:
-                logger.error(f"generate-windows-props failed: {result.stderr}")
+            if windows_result.returncode != 0:
+                logger.error(f"generate-windows-props failed: {windows_result.stderr}")
                 # Don't fail if Windows props generation fails, as it might not be needed
                 logger.warning("Windows properties generation failed, but continuing...")
 
@@ -272,8 +320,7 @@ class CppHandler:
         """
         # Must be lowercase letters, numbers, and underscores only
         # Must start with a letter
-        pattern = r"^[a-z][a-z0-9_]*$"
-        return bool(re.match(pattern, library_id))
+        return is_valid_library_id(library_id)
 
     def suggest_library_id(self, github_url: str) -> str:
         """Instance method that calls the static method"""
@@ -319,18 +366,31 @@ class CppHandler:
             logger.info(f"Testing installation of {library_id} {version}...")
             install_spec = f"{library_id} {version}"
 
-            result = run_ce_install_command(
-                ["install", "--force", install_spec], cwd=self.infra_path, debug=self.debug
+            # Install output can be long: scan it line by line for the staging message
+            # and only keep the tail for error reporting
+            staging_match = None
+            output_tail: deque[str] = deque(maxlen=_INSTALL_OUTPUT_TAIL_LINES)
+
+            def on_line(line: str) -> None:
+                nonlocal staging_match
+                output_tail.append(line)
+                if staging_match is None:
+                    staging_match = _STAGING_RE.search(line)
+
+            returncode = run_ce_install_command_streaming(
+                ["install", "--force", install_spec],
+                cwd=self.infra_path,
+                on_line=on_line,
+                debug=self.debug,
             )
+            # The install may have changed what ce_install reports as installed
+            clear_compiler_cache()
 
-            if result.returncode != 0:
-                logger.error(f"Installation test failed: {result.stderr}")
+            if returncode != 0:
+                logger.error(f"Installation test failed: {''.join(output_tail)}")
                 return False
 
             # Check for staging to destination message in output
-            output = result.stdout + result.stderr
-            staging_pattern = r"Moving from staging \((.*?)\) to final destination \((.*?)\)"
-            staging_match = re.search(staging_pattern, output)
 
             if not staging_match:
                 logger.error(
@@ -338,18 +398,21 @@ class CppHandler:
                 )
                 return False
 
-            destination_path = staging_match.group(2)
+            destination_path = staging_match.group(2).rstrip("/")
             logger.info(f"Installation destination: {destination_path}")
 
             # Check if destination path is in the properties file
             if self.main_path:
                 props_file = self.main_path / "etc" / "config" / "c++.amazon.properties"
-                if props_file.exists():
-                    props_content = props_file.read_text()
+                try:
+                    props_paths = read_properties_paths(props_file)
+                except FileNotFoundError:
+                    logger.warning("Properties file not found for verification")
+                else:
                     # Extract the library path from destination
                     # (e.g., /opt/compiler-explorer/libs/nlohmann_json/v3.11.3)
-                    # and check if it appears in the properties
-                    if destination_path not in props_content:
+                    # and check if it (or a path below it) appears in the properties
+                    if destination_path not in props_paths:
                         logger.error(
                             f"Inconsistency detected: Installation destination "
                             f"'{destination_path}' not found in properties file"
@@ -358,8 +421,6 @@ class CppHandler:
                             "This suggests the properties file and installation are out of sync"
                         )
                         return False
-                else:
-                    logger.warning("Properties file not found for verification")
 
             logger.info("Installation test succeeded")
             return True
@@ -393,11 +454,10 @@ class CppHandler:
                 logger.error(f"Path check failed: {result.stderr}")
                 return False
 
-            # Parse the output from list-paths
-            output = result.stdout + result.stderr
-
-            # Log the output for debugging
-            if self.debug:
+            # Log the output for debugging; only join it if the records will be emitted
+            log_output = self.debug and logger.isEnabledFor(logging.DEBUG)
+            if log_output:
+                output = result.stdout + result.stderr
                 logger.debug(f"list-paths command: ce_install list-paths {install_spec}")
                 logger.debug(f"list-paths output: {output}")
 
@@ -407,18 +467,17 @@ class CppHandler:
 
             # Try to parse the list-paths output format
             # Expected format: "libraries/c++/{library} {version}: {path}"
-            list_paths_pattern = r"libraries/c\+\+/\S+\s+\S+:\s+(.+)"
-            list_match = re.search(list_paths_pattern, output)
+            list_match = _search_output(_LIST_PATHS_RE, result)
 
             if list_match:
                 relative_path = list_match.group(1).strip()
                 # Convert relative path to absolute path
-                destination_path = f"/opt/compiler-explorer/{relative_path}"
+                destination_path = f"/opt/compiler-explorer/{relative_path}".rstrip("/")
                 logger.info(f"Library destination path: {destination_path}")
             else:
                 # If no match found, log the output and continue without path check
                 logger.warning("Could not parse destination path from list-paths output")
-                if self.debug:
+                if log_output:
                     logger.debug(f"Raw output was: {repr(output)}")
                 logger.warning("Skipping path consistency check")
                 return True
@@ -426,30 +485,32 @@ class CppHandler:
             # Check if destination path is in the properties file
             if self.main_path:
                 props_file = self.main_path / "etc" / "config" / "c++.amazon.properties"
-                if props_file.exists():
-                    props_content = props_file.read_text()
+                try:
+                    props_paths = read_properties_paths(props_file)
+                except FileNotFoundError:
+                    logger.warning("Properties file not found for verification")
+                else:
+                    # Candidates in order of preference, each a set lookup
+                    version_no_dots = version.replace(".", "")
+                    alternative_path = destination_path.replace(
+                        f"/{version}", f"/{version_no_dots}"
+                    )
+                    version_entry = (
+                        f"libs.{library_id}.versions.{version_no_dots}.version={version}"
+                    )
 
                     # Check for the exact path first
-                    path_found = destination_path in props_content
+                    path_found = destination_path in props_paths
 
                     # If not found, try the version without dots (common in properties files)
-                    if not path_found:
-                        version_no_dots = version.replace(".", "")
-                        alternative_path = destination_path.replace(
-                            f"/{version}", f"/{version_no_dots}"
-                        )
-                        path_found = alternative_path in props_content
+                    if not path_found and alternative_path != destination_path:
+                        path_found = alternative_path in props_paths
                         if path_found:
                             logger.info(f"Found alternative path format: {alternative_path}")
 
                     if not path_found:
                         # For existing libraries, check if library and version are present
-                        version_no_dots = version.replace(".", "")
-                        version_entry = (
-                            f"libs.{library_id}.versions.{version_no_dots}.version={version}"
-                        )
-
-                        if version_entry in props_content:
+                        if version_entry in read_properties_lines(props_file):
                             logger.info(
                                 f"Path not found, but version entry exists: {version_entry}. "
                                 "This may be normal for existing libraries."
@@ -461,10 +522,7 @@ class CppHandler:
                                 f"'{destination_path}' nor version entry '{version_entry}' "
                                 "found in properties file"
                             )
-                            alt_path = destination_path.replace(
-                                f"/{version}", f"/{version_no_dots}"
-                            )
-                            logger.info(f"Also tried alternative format: {alt_path}")
+                            logger.info(f"Also tried alternative format: {alternative_path}")
                             logger.error(
                                 "This suggests the properties file and library "
                                 "configuration are out of sync"
@@ -472,8 +530,6 @@ class CppHandler:
                             return False
                     else:
                         logger.info("Path consistency check passed")
-                else:
-                    logger.warning("Properties file not found for verification")
 
             logger.info("Path check succeeded")
             return True
@@ -1,11 +1,22 @@
 from __future__ import annotations
 
-import re
 from pathlib import Path
 from typing import Any
 
+from core.library_utils import write_properties_file
 from core.models import LibraryConfig
 
+# Section delimiter line in the properties files
+_SECTION_DELIMITER = "#################################"
+
+
+def _find_line_start(content: str, prefix: str, start: int = 0) -> int:
+    """Index of the first line at or after start that begins with prefix, or -1."""
+    if content.startswith(prefix, start) and (start == 0 or content[start - 1] == "\n"):
+        return start
+    index = content.find("\n" + prefix, start)
+    return index + 1 if index != -1 else -1
+
 
 def generate_library_entry(config: LibraryConfig) -> dict[str, Any]:
     """Generate the library configuration entry for compiler-explorer"""
@@ -13,11 +24,13 @@ def generate_library_entry(config: LibraryConfig) -> dict[str, Any]:
         # Rust libraries are handled differently
         return {"name": config.name, "version": config.version}
 
+    url = str(config.github_url)
+    name = url.rsplit("/", 1)[-1]
     entry = {
-        "id": config.github_url.split("/")[-1].lower(),
-        "name": config.github_url.split("/")[-1],
+        "id": name.lower(),
+        "name": name,
         "version": config.version,
-        "url": str(config.github_url),
+        "url": url,
     }
 
     if config.is_c_or_cpp():
@@ -43,31 +56,25 @@ def update_rust_properties(repo_path: Path, new_props_content: str):
     current_content = rust_props_path.read_text()
 
     # Find the libs= section
-    libs_match = re.search(r"^libs=", current_content, re.MULTILINE)
-    if not libs_match:
+    libs_start = _find_line_start(current_content, "libs=")
+    if libs_start == -1:
         raise ValueError("Could not find 'libs=' line in rust.amazon.properties")
 
-    libs_start = libs_match.start()
-
     # Find the end of the libs section
-    # Look for the delimiter or the start of tools section
-    delimiter_pattern = re.compile(r"^#################################", re.MULTILINE)
-    tools_pattern = re.compile(r"^tools=", re.MULTILINE)
-
-    # Search for delimiter after libs=
-    delimiter_match = delimiter_pattern.search(current_content, libs_start)
-    tools_match = tools_pattern.search(current_content, libs_start)
+    # Look for the delimiter or the start of tools section after libs=
+    delimiter_start = _find_line_start(current_content, _SECTION_DELIMITER, libs_start)
+    tools_start = _find_line_start(current_content, "tools=", libs_start)
 
     # Determine the end of libs section
     libs_end = len(current_content)  # Default to end of file
 
-    if delimiter_match and tools_match:
+    if delimiter_start != -1 and tools_start != -1:
         # Use whichever comes first
-        libs_end = min(delimiter_match.start(), tools_match.start())
-    elif delimiter_match:
-        libs_end = delimiter_match.start()
-    elif tools_match:
-        libs_end = tools_match.start()
+        libs_end = min(delimiter_start, tools_start)
+    elif delimiter_start != -1:
+        libs_end = delimiter_start
+    elif tools_start != -1:
+        libs_end = tools_start
 
     # Build the new content
     # Ensure new_props_content ends with a newline to avoid end-of-file issues
@@ -81,6 +88,6 @@ def update_rust_properties(repo_path: Path, new_props_content: str):
     )
 
     # Write the updated content
-    rust_props_path.write_text(new_content)
+    write_properties_file(rust_props_path, new_content, current_content)
 
     return rust_props_path
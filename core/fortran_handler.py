@@ -4,6 +4,7 @@ from __future__ import annotations
 import logging
 import re
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from .build_tester import (
@@ -16,14 +17,34 @@ from .library_utils import (
     setup_ce_install as setup_ce_install_shared,
 )
 from .library_utils import (
+    repository_has_root_file,
     suggest_library_id_from_github_url,
     update_properties_libs_line,
+    write_properties_file,
 )
 from .models import LibraryConfig
 from .subprocess_utils import run_ce_install_command, run_command
 
 logger = logging.getLogger(__name__)
 
+# Characters dropped from a version to form its properties key ("1.2.0" -> "120");
+# ASCII versions use the translate table, anything else falls back to the regex
+_VERSION_KEY_STRIP_RE = re.compile(r"[^a-z0-9]")
+_VERSION_KEY_DELETE_TABLE = str.maketrans(
+    "", "", "".join(c for c in map(chr, range(128)) if _VERSION_KEY_STRIP_RE.match(c))
+)
+
+# Banner opening the tools section; library properties are inserted before it
+_TOOLS_SECTION_RE = re.compile(r"\n(#{33}\n#{33}\n# Installed tools)")
+
+# Concurrent fpm.toml checks when adding several libraries at once
+_MAX_VALIDATION_WORKERS = 8
+
+_MISSING_FPM_TOML = "Repository does not contain fpm.toml file (required for Fortran packages)"
+
+# validate_fpm_package answers keyed by repository URL
+_FPM_VALIDATION_CACHE: dict[str, tuple[bool, str | None]] = {}
+
 
 class FortranHandler:
     """Handles Fortran library additions to Compiler Explorer infrastructure."""
@@ -38,36 +59,88 @@ class FortranHandler:
         self.infra_path = infra_path
         self.main_path = main_path
         self.debug = debug
-        if setup_ce_install:
-            self.setup_ce_install()
+        # ce_install is set up on first use, so handlers that only suggest IDs
+        # or validate packages never run `make ce`
+        self._ce_install_ready = not setup_ce_install
 
     def setup_ce_install(self) -> bool:
         """Ensure ce_install is available"""
-        return setup_ce_install_shared(self.infra_path, self.debug)
+        ready = setup_ce_install_shared(self.infra_path, self.debug)
+        # Only remember success, so a failed setup is retried on the next call
+        self._ce_install_ready = ready
+        return ready
+
+    def _ensure_ce_install(self) -> bool:
+        """Set up ce_install if this handler has not done so yet; False if setup fails."""
+        if self._ce_install_ready:
+            return True
+        try:
+            return self.setup_ce_install()
+        except RuntimeError as e:
+            logger.error(str(e))
+            return False
 
     def validate_fpm_package(self, github_url: str) -> tuple[bool, str | None]:
         """
-        Clone repository and validate it has fmp.toml file.
+        Validate the repository has an fpm.toml file, cloning it only if the host
+        cannot be asked for that one file directly.
+        Definite answers are cached for the rest of the process.
         Returns (is_valid, error_message)
         """
+        # https://github.com/x/y, https://github.com/x/y/ and .../y.git are one repo
+        cache_key = str(github_url).rstrip("/").removesuffix(".git")
+        cached = _FPM_VALIDATION_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+
+        result = self._check_fpm_toml(github_url)
+        # Clone and network failures are not cached, so they are retried next time
+        if result[0] or result[1] == _MISSING_FPM_TOML:
+            _FPM_VALIDATION_CACHE[cache_key] = result
+        return result
+
+    def _check_fpm_toml(self, github_url: str) -> tuple[bool, str | None]:
+        """Look for fpm.toml at the repository root; returns (is_valid, error_message)."""
+        has_fpm_toml = repository_has_root_file(str(github_url), "fpm.toml")
+        if has_fpm_toml is not None:
+            if not has_fpm_toml:
+                return False, _MISSING_FPM_TOML
+            return True, None
+
         try:
             with tempfile.TemporaryDirectory() as tmp_dir:
                 tmp_path = Path(tmp_dir)
                 clone_path = tmp_path / "repo"
 
+                # Only the tip commit's trees are needed to see whether fpm.toml exists
                 result = run_command(
-                    ["git", "clone", str(github_url), str(clone_path)], debug=self.debug
+                    [
+                        "git",
+                        "clone",
+                        "--depth",
+                        "1",
+                        "--filter=blob:none",
+                        "--no-checkout",
+                        str(github_url),
+                        str(clone_path),
+                    ],
+                    debug=self.debug,
                 )
 
                 if result.returncode != 0:
                     return False, f"Failed to clone repository: {result.stderr}"
 
-                fmp_toml = clone_path / "fpm.toml"
-                if not fmp_toml.exists():
-                    return (
-                        False,
-                        "Repository does not contain fpm.toml file (required for Fortran packages)",
-                    )
+                result = run_command(
+                    ["git", "ls-tree", "--name-only", "HEAD", "fpm.toml"],
+                    cwd=clone_path,
+                    debug=self.debug,
+                )
+
+                if result.returncode != 0:
+                    return False, f"Failed to inspect repository: {result.stderr}"
+
+                if not result.stdout.strip():
+                    return False, _MISSING_FPM_TOML
 
                 return True, None
 
@@ -83,22 +156,27 @@ class FortranHandler:
         """Generate a suggested library ID from GitHub URL"""
         return self.suggest_library_id_static(github_url)
 
-    def add_library(self, config: LibraryConfig) -> str | None:
+    def add_library(self, config: LibraryConfig, validate: bool = True) -> str | None:
         """
         Add Fortran library to libraries.yaml using ce_install.
+        Pass validate=False if validate_fpm_package has already accepted the repository.
         Returns library_id if successful, None otherwise.
         """
         try:
             if not config.github_url:
                 raise ValueError(GITHUB_URL_REQUIRED.format("Fortran"))
 
-            is_valid, error_msg = self.validate_fpm_package(config.github_url)
-            if not is_valid:
-                logger.error(f"Fortran package validation failed: {error_msg}")
-                return None
+            if validate:
+                is_valid, error_msg = self.validate_fpm_package(config.github_url)
+                if not is_valid:
+                    logger.error(f"Fortran package validation failed: {error_msg}")
+                    return None
 
             library_id = config.library_id or self.suggest_library_id(config.github_url)
 
+            if not self._ensure_ce_install():
+                return None
+
             result = run_ce_install_command(
                 ["fortran-library", "add", str(config.github_url), config.version],
                 cwd=self.infra_path,
@@ -116,6 +194,36 @@ class FortranHandler:
             logger.error(f"Error adding Fortran library: {e}")
             return None
 
+    def add_libraries(self, configs: list[LibraryConfig]) -> list[str | None]:
+        """
+        Add several Fortran libraries to libraries.yaml using ce_install.
+
+        The fpm.toml checks are independent network round-trips and run
+        concurrently; the ce_install additions run one at a time because each
+        one rewrites libraries.yaml.
+
+        Returns the library_id for each config (None where adding it failed).
+        """
+        if not configs:
+            return []
+
+        def validate(config: LibraryConfig) -> tuple[bool, str | None]:
+            if not config.github_url:
+                return False, GITHUB_URL_REQUIRED.format("Fortran")
+            return self.validate_fpm_package(config.github_url)
+
+        with ThreadPoolExecutor(max_workers=min(_MAX_VALIDATION_WORKERS, len(configs))) as executor:
+            validations = list(executor.map(validate, configs))
+
+        library_ids = []
+        for config, (is_valid, error_msg) in zip(configs, validations):
+            if is_valid:
+                library_ids.append(self.add_library(config, validate=False))
+            else:
+                logger.error(f"Fortran package validation failed: {error_msg}")
+                library_ids.append(None)
+        return library_ids
+
     def update_fortran_properties(self, library_id: str, config: LibraryConfig) -> bool:
         """
         Update the main repo's fortran.amazon.properties file with the new library.
@@ -133,46 +241,54 @@ class FortranHandler:
                 return False
 
             with open(props_file, encoding="utf-8") as f:
-                content = f.read()
+                current_content = f.read()
 
-            version_key = re.sub(r"[^a-z0-9]", "", config.version.lower())
+            version_lower = config.version.lower()
+            if version_lower.isascii():
+                version_key = version_lower.translate(_VERSION_KEY_DELETE_TABLE)
+            else:
+                version_key = _VERSION_KEY_STRIP_RE.sub("", version_lower)
 
-            library_props = []
-            library_props.append(f"libs.{library_id}.name={library_id}")
-            library_props.append(f"libs.{library_id}.url={config.github_url}")
+            prefix = f"libs.{library_id}"
+            library_props = [f"{prefix}.name={library_id}", f"{prefix}.url={config.github_url}"]
 
             if hasattr(config, "description") and config.description:
-                library_props.append(f"libs.{library_id}.description={config.description}")
+                library_props.append(f"{prefix}.description={config.description}")
 
-            library_props.append(f"libs.{library_id}.staticliblink={library_id}")
-            library_props.append(f"libs.{library_id}.versions={version_key}")
-            library_props.append(f"libs.{library_id}.packagedheaders=true")
-            library_props.append(
-                f"libs.{library_id}.versions.{version_key}.version={config.version}"
-            )
+            library_props += [
+                f"{prefix}.staticliblink={library_id}",
+                f"{prefix}.versions={version_key}",
+                f"{prefix}.packagedheaders=true",
+                f"{prefix}.versions.{version_key}.version={config.version}",
+            ]
+            library_block = "\n".join(library_props)
+
+            content = update_properties_libs_line(current_content, library_id)
 
-            content = update_properties_libs_line(content, library_id)
+            # Re-running for a library already listed with this exact block is a no-op
+            if content == current_content and library_block in content:
+                logger.info(f"{library_id} {config.version} is already in {props_file.name}")
+                return True
 
             # Find insertion point before tools section
-            tools_section_match = re.search(
-                r"\n(#{33}\n#{33}\n# Installed tools)",
-                content,
-            )
+            tools_section_match = _TOOLS_SECTION_RE.search(content)
 
             if tools_section_match:
                 insertion_point = tools_section_match.start()
-                new_content = (
-                    content[:insertion_point]
-                    + "\n"
-                    + "\n".join(library_props)
-                    + "\n\n"
-                    + content[insertion_point:]
+                # One join sizes the result once instead of copying it per "+"
+                new_content = "".join(
+                    (
+                        content[:insertion_point],
+                        "\n",
+                        library_block,
+                        "\n\n",
+                        content[insertion_point:],
+                    )
                 )
             else:
-                new_content = content + "\n\n" + "\n".join(library_props) + "\n"
+                new_content = "".join((content, "\n\n", library_block, "\n"))
 
-            with open(props_file, "w", encoding="utf-8") as f:
-                f.write(new_content)
+            write_properties_file(props_file, new_content, current_content)
 
             logger.info(f"Successfully updated {props_file.name}")
             return True
@@ -188,6 +304,8 @@ class FortranHandler:
         Returns:
             Tuple of (available, message)
         """
+        if not self._ensure_ce_install():
+            return False, "ce_install setup failed"
         return check_fortran_build_test_available(self.infra_path, self.debug)
 
     def run_build_test(
@@ -210,6 +328,8 @@ class FortranHandler:
         Returns:
             BuildTestResult with success status, message, and artifact information
         """
+        if not self._ensure_ce_install():
+            return BuildTestResult(success=False, message="ce_install setup failed")
         return run_fortran_build_test(
             infra_path=self.infra_path,
             library_id=library_id,
@@ -1,30 +1,76 @@
 """Shared utilities for library handlers."""
+import copy
+import functools
+import hashlib
+import http.client
 import logging
+import os
 import re
+import shutil
+import string
 import tempfile
+import urllib.error
+import urllib.request
 from pathlib import Path
 
-from .models import LibraryType
+from .models import LibraryType, extract_github_repo_info
 from .subprocess_utils import run_ce_install_command, run_command, run_make_command
 
 logger = logging.getLogger(__name__)
 
+# Successful clone analyses keyed by repository URL; detect_library_type and
+# add_library both analyse the same repository during one run.
+_ANALYSIS_CACHE: dict[str, dict] = {}
 
-def clone_repository(github_url: str, clone_path: Path) -> bool:
+# Properties file contents keyed by path, reused while the mtime and size are unchanged
+_PROPS_CACHE: dict[Path, tuple[tuple[int, int], str]] = {}
+_PROPS_LINES_CACHE: dict[Path, tuple[tuple[int, int], frozenset[str]]] = {}
+_PROPS_PATHS_CACHE: dict[Path, tuple[tuple[int, int], frozenset[str]]] = {}
+
+# Install locations referenced by properties values (paths may be ':'-separated)
+_CE_INSTALL_ROOT = "/opt/compiler-explorer/"
+_PROPS_PATH_RE = re.compile(r"/opt/compiler-explorer/[^\s:;]+")
+
+# Legacy libraries.yaml `type` values that name a library type directly
+_CONFIG_LIBRARY_TYPES = frozenset(library_type.value for library_type in LibraryType)
+
+# Library IDs are lowercase letters, numbers and underscores, starting with a letter
+_LIBRARY_ID_FIRST_CHARS = frozenset(string.ascii_lowercase)
+_LIBRARY_ID_CHARS = _LIBRARY_ID_FIRST_CHARS | frozenset(string.digits + "_")
+
+# Repository name in a GitHub URL, and the character runs a suggested ID replaces
+_GITHUB_REPO_NAME_RE = re.compile(r"github\.com/[^/]+/([^/]+)")
+_NON_LIBRARY_ID_RUN_RE = re.compile(r"[^a-z0-9]+")
+
+# Remote URL schemes whose git transport supports `git archive --remote`
+_ARCHIVE_PROBE_SCHEMES = ("ssh://", "git://")
+
+# Persistent shallow clones below the home directory, reused across runs and
+# refreshed with git fetch. The least recently used clones are evicted once the
+# total exceeds CE_LIB_WIZARD_CLONE_CACHE_MB megabytes.
+_CLONE_CACHE_SUBDIR = Path(".cache") / "ce-lib-wizard" / "clones"
+_CLONE_CACHE_DEFAULT_MB = 2048
+
+
+def clone_repository(github_url: str, clone_path: Path, ref: str | None = None) -> bool:
     """
     Clone a GitHub repository to the specified path.
 
     Args:
         github_url: GitHub repository URL
         clone_path: Path where to clone the repository
+        ref: Branch or tag to clone (default branch if None)
 
     Returns:
         True if cloning succeeded, False otherwise
     """
+    cmd = ["git", "clone", "--depth", "1", "--no-tags"]
+    if ref:
+        cmd.extend(["--branch", ref])
+    cmd.extend([github_url, str(clone_path)])
+
     try:
-        result = run_command(
-            ["git", "clone", "--depth", "1", github_url, str(clone_path)], clean_env=False
-        )
+        result = run_command(cmd, clean_env=False)
 
         if result.returncode != 0:
             logger.error(f"Failed to clone repository: {result.stderr}")
@@ -37,6 +83,227 @@ def clone_repository(github_url: str, clone_path: Path) -> bool:
         return False
 
 
+def _repository_key(repo_url: str) -> str:
+    """Normalize a repository URL: https://github.com/x/y, .../y/ and .../y.git are one repo."""
+    return repo_url.rstrip("/").removesuffix(".git")
+
+
+def _clone_cache_dir() -> Path | None:
+    """Get the clone cache directory, creating it, or None if it cannot be used."""
+    try:
+        cache_dir = Path.home() / _CLONE_CACHE_SUBDIR
+        cache_dir.mkdir(parents=True, exist_ok=True)
+    except (OSError, RuntimeError) as e:
+        logger.debug(f"Clone cache unavailable: {e}")
+        return None
+
+    if not os.access(cache_dir, os.W_OK | os.X_OK):
+        logger.debug(f"Clone cache {cache_dir} is not writable")
+        return None
+    return cache_dir
+
+
+def _clone_cache_max_bytes() -> int:
+    """Get the clone cache size cap, ignoring an unparseable environment override."""
+    value = os.environ.get("CE_LIB_WIZARD_CLONE_CACHE_MB")
+    megabytes = _CLONE_CACHE_DEFAULT_MB
+    if value:
+        try:
+            megabytes = int(value)
+        except ValueError:
+            logger.warning(f"Ignoring invalid CE_LIB_WIZARD_CLONE_CACHE_MB={value!r}")
+    return megabytes * 1024 * 1024
+
+
+def _directory_size(path: Path) -> int:
+    """Total size in bytes of the files below path, without following symlinks."""
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _evict_clone_cache(cache_dir: Path, keep: Path) -> None:
+    """Remove the least recently used cached clones until the cache fits its size cap."""
+    try:
+        entries = [
+            (entry.stat().st_mtime, Path(entry.path))
+            for entry in os.scandir(cache_dir)
+            if entry.is_dir(follow_symlinks=False)
+        ]
+    except OSError:
+        return
+
+    max_bytes = _clone_cache_max_bytes()
+    sizes = {path: _directory_size(path) for _mtime, path in entries}
+    total = sum(sizes.values())
+    for _mtime, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        logger.debug(f"Evicting cached clone {path}")
+        shutil.rmtree(path, ignore_errors=True)
+        total -= sizes[path]
+
+
+def get_or_update_clone(github_url: str, ref: str | None = None) -> Path | None:
+    """
+    Get an up-to-date shallow clone of a repository from the persistent clone cache.
+
+    On a cache hit the existing clone is refreshed with a shallow fetch and reset
+    to the fetched commit; on a miss the repository is cloned into the cache.
+
+    Args:
+        github_url: GitHub repository URL
+        ref: Branch or tag to check out (default branch if None)
+
+    Returns:
+        Path to the cached clone, or None if it could not be cloned or updated
+        (including when the clone cache directory is not writable)
+    """
+    cache_dir = _clone_cache_dir()
+    if cache_dir is None:
+        return None
+
+    key = hashlib.sha256(f"{_repository_key(github_url)}\0{ref or ''}".encode()).hexdigest()
+    clone_path = cache_dir / key
+
+    try:
+        if (clone_path / ".git").exists():
+            git = ["git", "-C", str(clone_path)]
+            result = run_command(
+                git + ["fetch", "--depth", "1", "--no-tags", "origin", ref or "HEAD"],
+                clean_env=False,
+            )
+            if result.returncode == 0:
+                run_command(git + ["reset", "--hard", "FETCH_HEAD"], clean_env=False)
+                run_command(git + ["clean", "-fdx"], clean_env=False)
+                os.utime(clone_path)
+                return clone_path
+
+            logger.debug(f"Failed to update cached clone, cloning again: {result.stderr}")
+            shutil.rmtree(clone_path, ignore_errors=True)
+
+        if not clone_repository(github_url, clone_path, ref):
+            shutil.rmtree(clone_path, ignore_errors=True)
+            return None
+
+        _evict_clone_cache(cache_dir, keep=clone_path)
+        return clone_path
+
+    except Exception as e:
+        logger.error(f"Error preparing cached clone: {e}")
+        return None
+
+
+def _github_has_root_file(github_url: str, filename: str) -> bool | None:
+    """
+    Probe raw.githubusercontent.com for a top-level file without cloning.
+
+    Unlike the REST API, raw file requests are not subject to the
+    unauthenticated API rate limit.
+
+    Args:
+        github_url: GitHub repository URL
+        filename: File name at the repository root
+
+    Returns:
+        True or False if GitHub answered, None if it could not be asked or the
+        repository itself was not found (not a GitHub URL, offline, private, ...)
+    """
+    repo_info = extract_github_repo_info(github_url)
+    if not repo_info:
+        return None
+
+    owner, repo = repo_info
+    repo = repo.removesuffix(".git")
+    found = _github_url_exists(f"https://raw.githubusercontent.com/{owner}/{repo}/HEAD/{filename}")
+
+    # raw.githubusercontent.com also answers 404 for mistyped, deleted or private
+    # repositories, so a 404 only means "no such file" if the repository exists
+    if found is False and _github_url_exists(f"https://github.com/{owner}/{repo}") is not True:
+        return None
+    return found
+
+
+def _github_url_exists(url: str) -> bool | None:
+    """
+    Send a HEAD request to a GitHub URL.
+
+    Args:
+        url: URL to check
+
+    Returns:
+        True if it exists, False on 404, None if GitHub could not be asked
+    """
+    request = urllib.request.Request(url, method="HEAD")
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status == 200
+    except urllib.error.HTTPError as e:
+        return False if e.code == 404 else None
+    except (OSError, http.client.HTTPException) as e:
+        # URLError, timeouts, SSL errors and dropped connections alike
+        logger.debug(f"HEAD {url} failed: {e}")
+        return None
+
+
+def _archive_has_root_file(repo_url: str, filename: str) -> bool | None:
+    """
+    Ask a non-GitHub remote for a top-level file via `git archive --remote`.
+
+    Only the single file is transferred. upload-archive is not available over
+    http(s), so other URLs are not asked at all, and hosts that refuse it (GitHub
+    and many others) are reported as None so the caller falls back to cloning.
+
+    Args:
+        repo_url: Git repository URL
+        filename: File name at the repository root
+
+    Returns:
+        True or False if the remote answered, None if it could not be asked
+    """
+    if not repo_url.startswith(_ARCHIVE_PROBE_SCHEMES):
+        return None
+
+    try:
+        result = run_command(
+            ["git", "archive", "--remote", repo_url, "HEAD", filename],
+            text=False,
+            clean_env=False,
+        )
+    except Exception as e:
+        logger.debug(f"git archive probe failed: {e}")
+        return None
+
+    if result.returncode == 0:
+        return True
+    if b"did not match any files" in result.stderr:
+        return False
+    return None
+
+
+def repository_has_root_file(repo_url: str, filename: str) -> bool | None:
+    """
+    Check for a top-level file without cloning, if the host allows it.
+
+    Args:
+        repo_url: Git repository URL
+        filename: File name at the repository root
+
+    Returns:
+        True or False if the host answered, None if the caller has to clone to find out
+    """
+    if extract_github_repo_info(repo_url):
+        return _github_has_root_file(repo_url, filename)
+    return _archive_has_root_file(repo_url, filename)
+
+
 def analyze_repository_structure(clone_path: Path) -> dict:
     """
     Analyze a cloned repository structure to determine build system and targets.
@@ -75,9 +342,20 @@ def analyze_repository_structure(clone_path: Path) -> dict:
         return analysis
 
 
+def clear_analysis_cache() -> None:
+    """Forget cached repository analyses so the next call clones again."""
+    _ANALYSIS_CACHE.clear()
+
+
 def clone_and_analyze_repository(github_url: str) -> tuple[bool, dict]:
     """
-    Clone a repository and analyze its structure in a temporary directory.
+    Clone a repository into the persistent clone cache and analyze its structure.
+
+    If the clone cache cannot be written, a temporary clone is used instead.
+
+    Successful analyses are cached per repository URL (ignoring a trailing
+    slash or .git suffix), so repeated calls for the same repository do not
+    clone it again. Failures are not cached.
 
     Args:
         github_url: GitHub repository URL
@@ -85,16 +363,38 @@ def clone_and_analyze_repository(github_url: str) -> tuple[bool, dict]:
     Returns:
         Tuple of (success, analysis_results)
     """
-    with tempfile.TemporaryDirectory() as tmpdir:
-        clone_path = Path(tmpdir) / "repo"
+    cache_key = _repository_key(github_url)
+    cached = _ANALYSIS_CACHE.get(cache_key)
+    if cached is not None:
+        logger.debug(f"Using cached repository analysis for {github_url}")
+        return True, copy.deepcopy(cached)
+
+    # Target detection needs a full checkout to configure CMake, but repositories
+    # without a root CMakeLists.txt have nothing to analyze, so skip the clone.
+    if repository_has_root_file(github_url, "CMakeLists.txt") is False:
+        logger.debug(f"No CMakeLists.txt in {github_url}, skipping clone")
+        analysis = {"has_cmake": False, "cmake_targets": None, "main_targets": None}
+        _ANALYSIS_CACHE[cache_key] = copy.deepcopy(analysis)
+        return True, analysis
 
-        # Clone the repository
-        if not clone_repository(github_url, clone_path):
+    if _clone_cache_dir() is not None:
+        # Clone the repository, or refresh a previously cached clone
+        clone_path = get_or_update_clone(github_url)
+        if clone_path is None:
             return False, {}
 
-        # Analyze the repository structure
         analysis = analyze_repository_structure(clone_path)
-        return True, analysis
+    else:
+        # No writable clone cache (e.g. a read-only home directory): use a throwaway clone
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clone_path = Path(tmp_dir) / "repo"
+            if not clone_repository(github_url, clone_path):
+                return False, {}
+
+            analysis = analyze_repository_structure(clone_path)
+
+    _ANALYSIS_CACHE[cache_key] = copy.deepcopy(analysis)
+    return True, analysis
 
 
 def get_cmake_targets_from_path(clone_path: Path) -> list[str] | None:
@@ -219,6 +519,23 @@ def setup_ce_install(infra_path: Path, debug: bool = False) -> bool:
         raise RuntimeError(f"Error setting up ce_install: {e}") from e
 
 
+def is_valid_library_id(library_id: str) -> bool:
+    """
+    Check that a library ID follows the lowercase_with_underscores convention.
+
+    Args:
+        library_id: The library identifier to validate
+
+    Returns:
+        True if valid, False otherwise
+    """
+    return (
+        bool(library_id)
+        and library_id[0] in _LIBRARY_ID_FIRST_CHARS
+        and _LIBRARY_ID_CHARS.issuperset(library_id)
+    )
+
+
 def suggest_library_id_from_github_url(github_url: str) -> str:
     """
     Suggest a library ID based on the GitHub URL.
@@ -230,7 +547,7 @@ def suggest_library_id_from_github_url(github_url: str) -> str:
         Suggested library ID following naming conventions
     """
     # Extract repo name from URL
-    match = re.search(r"github\.com/[^/]+/([^/]+)", str(github_url))
+    match = _GITHUB_REPO_NAME_RE.search(str(github_url))
     if not match:
         return "unknown_library"
 
@@ -240,11 +557,13 @@ def suggest_library_id_from_github_url(github_url: str) -> str:
     if repo_name.endswith(".git"):
         repo_name = repo_name[:-4]
 
-    # Convert to lowercase and replace non-alphanumeric with underscores
-    library_id = re.sub(r"[^a-z0-9]+", "_", repo_name.lower())
-
-    # Remove consecutive underscores and leading/trailing underscores
-    library_id = re.sub(r"_+", "_", library_id).strip("_")
+    # Convert to lowercase and replace each run of non-alphanumerics (underscores
+    # included, so no doubled underscores remain) with one underscore; names that
+    # are already valid ID characters without doubled underscores need no rewrite
+    library_id = repo_name.lower()
+    if not _LIBRARY_ID_CHARS.issuperset(library_id) or "__" in library_id:
+        library_id = _NON_LIBRARY_ID_RUN_RE.sub("_", library_id)
+    library_id = library_id.strip("_")
 
     # Ensure it starts with a letter
     if library_id and not library_id[0].isalpha():
@@ -276,21 +595,9 @@ def detect_library_type_from_analysis(
 
         # Check legacy type field
         lib_type = existing_config.get("type")
-        if lib_type == "header-only":
-            logger.info("Using existing configuration: library is header-only")
-            return True, LibraryType.HEADER_ONLY.value
-        elif lib_type == "packaged-headers":
-            logger.info("Using existing configuration: library is packaged-headers")
-            return True, LibraryType.PACKAGED_HEADERS.value
-        elif lib_type == "static":
-            logger.info("Using existing configuration: library is static")
-            return True, LibraryType.STATIC.value
-        elif lib_type == "shared":
-            logger.info("Using existing configuration: library is shared")
-            return True, LibraryType.SHARED.value
-        elif lib_type == "cshared":
-            logger.info("Using existing configuration: library is cshared")
-            return True, LibraryType.CSHARED.value
+        if lib_type in _CONFIG_LIBRARY_TYPES:
+            logger.info(f"Using existing configuration: library is {lib_type}")
+            return True, lib_type
 
         # If it's type: github with no explicit build_type, it might be header-only by default
         if lib_type == "github" and build_type is None:
@@ -328,10 +635,29 @@ def get_link_targets_from_analysis(analysis: dict, library_type_value: str) -> l
     return None
 
 
+@functools.lru_cache(maxsize=8)
+def _query_ce_install_link_support(infra_path: Path) -> tuple[bool, bool]:
+    """Run `cpp-library add --help` once per infra path; failures raise and are not cached."""
+    help_result = run_ce_install_command(
+        ["cpp-library", "add", "--help"], cwd=infra_path, debug=False
+    )
+    if help_result.returncode != 0:
+        raise RuntimeError(
+            f"cpp-library add --help exited with code {help_result.returncode}: "
+            f"{help_result.stderr.strip()}"
+        )
+    return (
+        "--static-lib-link" in help_result.stdout,
+        "--shared-lib-link" in help_result.stdout,
+    )
+
+
 def check_ce_install_link_support(infra_path: Path) -> dict[str, bool]:
     """
     Check which link target parameters are supported by ce_install.
 
+    The help output is only queried once per infra path.
+
     Args:
         infra_path: Path to the infra repository
 
@@ -339,19 +665,125 @@ def check_ce_install_link_support(infra_path: Path) -> dict[str, bool]:
         Dict with support status for different link parameters
     """
     try:
-        help_result = run_ce_install_command(
-            ["cpp-library", "add", "--help"], cwd=infra_path, debug=False
-        )
-
-        return {
-            "static_lib_link": "--static-lib-link" in help_result.stdout,
-            "shared_lib_link": "--shared-lib-link" in help_result.stdout,
-        }
+        static_lib_link, shared_lib_link = _query_ce_install_link_support(infra_path)
+        return {"static_lib_link": static_lib_link, "shared_lib_link": shared_lib_link}
     except Exception as e:
         logger.warning(f"Could not check ce_install link support: {e}")
         return {"static_lib_link": False, "shared_lib_link": False}
 
 
+def _file_stamp(path: Path) -> tuple[int, int]:
+    """Get (mtime_ns, size) from a single stat() call, for cache validation."""
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size
+
+
+def read_properties_file(path: Path) -> str:
+    """
+    Read a properties file, reusing the cached text if it has not been modified.
+
+    Args:
+        path: Path to the properties file
+
+    Returns:
+        The file content
+    """
+    stamp = _file_stamp(path)
+    cached = _PROPS_CACHE.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    content = path.read_text()
+    _PROPS_CACHE[path] = (stamp, content)
+    return content
+
+
+def read_properties_lines(path: Path) -> frozenset[str]:
+    """
+    Get the stripped, non-empty lines of a properties file for whole-line lookups.
+
+    Built once per file modification, like read_properties_file().
+
+    Args:
+        path: Path to the properties file
+
+    Returns:
+        Set of the file's lines
+    """
+    stamp = _file_stamp(path)
+    cached = _PROPS_LINES_CACHE.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    lines = frozenset(
+        stripped for line in read_properties_file(path).splitlines() if (stripped := line.strip())
+    )
+    _PROPS_LINES_CACHE[path] = (stamp, lines)
+    return lines
+
+
+def read_properties_paths(path: Path) -> frozenset[str]:
+    """
+    Get every /opt/compiler-explorer path in a properties file, with all its parents.
+
+    Including the parent directories means `destination in paths` is true when the
+    destination itself or anything below it (include/, lib/, ...) is referenced.
+    Built once per file modification, like read_properties_file().
+
+    Args:
+        path: Path to the properties file
+
+    Returns:
+        Set of referenced install paths, without trailing slashes; strip any
+        trailing slash from a path before looking it up
+    """
+    stamp = _file_stamp(path)
+    cached = _PROPS_PATHS_CACHE.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    paths: set[str] = set()
+    for match in _PROPS_PATH_RE.finditer(read_properties_file(path)):
+        install_path = match.group(0).rstrip("/")
+        # Stop early once a parent is known; its own parents were added with it
+        while install_path.startswith(_CE_INSTALL_ROOT) and install_path not in paths:
+            paths.add(install_path)
+            install_path = install_path.rpartition("/")[0]
+
+    frozen = frozenset(paths)
+    _PROPS_PATHS_CACHE[path] = (stamp, frozen)
+    return frozen
+
+
+def write_properties_file(path: Path, content: str, current_content: str | None = None) -> bool:
+    """
+    Replace a properties file atomically, skipping the write if nothing changed.
+
+    The content is written to a sibling temporary file that is then renamed over
+    the original, so an interrupted write never leaves a truncated file behind.
+
+    Args:
+        path: Path to the properties file
+        content: The new file content
+        current_content: The file's current content, if already read
+
+    Returns:
+        True if the file was written, False if it already had this content
+    """
+    if content == current_content:
+        return False
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        tmp_path.write_text(content, encoding="utf-8")
+        shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return True
+
+
 def update_properties_libs_line(content: str, library_id: str) -> str:
     """
     Update the libs= line in a properties file to include a new library.
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import copy
+import functools
 import subprocess
 import tempfile
 import urllib.request
@@ -11,6 +13,11 @@ from pydantic import BaseModel, HttpUrl, field_validator
 
 from .subprocess_utils import run_command
 
+try:
+    from yaml import CSafeLoader as _YamlSafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _YamlSafeLoader
+
 
 class Language(str, Enum):
     C = "C"
@@ -121,6 +128,33 @@ def check_git_tag_with_fallback(repo_url: str, tag: str) -> bool:
     return False
 
 
+@functools.lru_cache(maxsize=4)
+def _load_libraries_yaml(path_str: str, mtime_ns: int, size: int):
+    """Parse libraries.yaml once per (path, mtime, size); the result must not be mutated."""
+    with open(path_str, encoding="utf-8") as f:
+        return yaml.load(f, Loader=_YamlSafeLoader)
+
+
+def load_libraries_yaml(path: Path):
+    """
+    Parse a libraries.yaml file, reusing the parsed data while the file is unchanged.
+
+    The returned data is shared between callers and must not be mutated.
+
+    Args:
+        path: Path to libraries.yaml
+
+    Returns:
+        The parsed YAML data
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        yaml.YAMLError: If the file cannot be parsed
+    """
+    st = path.stat()
+    return _load_libraries_yaml(str(path), st.st_mtime_ns, st.st_size)
+
+
 def check_existing_library_config(
     repo_url: str, library_id: str, infra_repo_path: Path | None = None
 ) -> dict | None:
@@ -133,12 +167,8 @@ def check_existing_library_config(
 
     libraries_yaml_path = infra_repo_path / "bin" / "yaml" / "libraries.yaml"
 
-    if not libraries_yaml_path.exists():
-        return None
-
     try:
-        with open(libraries_yaml_path, encoding="utf-8") as f:
-            libraries_data = yaml.safe_load(f)
+        libraries_data = load_libraries_yaml(libraries_yaml_path)
 
         if not isinstance(libraries_data, dict):
             return None
@@ -155,7 +185,7 @@ def check_existing_library_config(
 
             # Check if library_id exists in this language section
             if library_id in lang_libs:
-                return lang_libs[library_id]
+                return copy.deepcopy(lang_libs[library_id])
 
             # Also check by GitHub URL/repo since library_id might be different
             for lib_config in lang_libs.values():
@@ -164,11 +194,11 @@ def check_existing_library_config(
                     lib_repo = lib_config.get("repo")
 
                     if lib_url == repo_url:
-                        return lib_config
+                        return copy.deepcopy(lib_config)
 
                     # Also check repo field which might be in format "owner/repo"
                     if lib_repo and repo_url.endswith(f"/{lib_repo}"):
-                        return lib_config
+                        return copy.deepcopy(lib_config)
 
         return None
 
@@ -176,11 +206,21 @@ def check_existing_library_config(
         return None
 
 
+# Remote lookups keyed by (repo_url, library_id); only answers from a successful
+# infra clone are stored, so a network failure is retried on the next call.
+_REMOTE_CONFIG_CACHE: dict[tuple[str, str], dict | None] = {}
+
+
 def check_existing_library_config_remote(repo_url: str, library_id: str) -> dict | None:
     """
     Check if a library already exists by temporarily cloning the infra repository.
     This is used during interactive detection when we don't have the repo yet.
+    Results are cached for the rest of the process.
     """
+    cache_key = (repo_url, library_id)
+    if cache_key in _REMOTE_CONFIG_CACHE:
+        return copy.deepcopy(_REMOTE_CONFIG_CACHE[cache_key])
+
     try:
         with tempfile.TemporaryDirectory() as tmpdir:
             infra_path = Path(tmpdir) / "infra"
@@ -201,7 +241,9 @@ def check_existing_library_config_remote(repo_url: str, library_id: str) -> dict
             if result.returncode != 0:
                 return None
 
-            return check_existing_library_config(repo_url, library_id, infra_path)
+            existing_config = check_existing_library_config(repo_url, library_id, infra_path)
+            _REMOTE_CONFIG_CACHE[cache_key] = copy.deepcopy(existing_config)
+            return existing_config
 
     except Exception:
         return None
@@ -4,6 +4,7 @@ from __future__ import annotations
 import logging
 import os
 import subprocess
+from collections.abc import Callable
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -19,6 +20,37 @@ def get_clean_env() -> dict[str, str]:
     return env
 
 
+def _as_text(output: str | bytes) -> str:
+    """Decode captured output for logging when a command was run with text=False."""
+    if isinstance(output, bytes):
+        return output.decode(errors="replace")
+    return output
+
+
+def _command_env(clean_env: bool, extra_env: dict[str, str] | None) -> dict[str, str]:
+    """Build the environment for a command."""
+    env = get_clean_env() if clean_env else os.environ.copy()
+    if extra_env:
+        env.update(extra_env)
+    return env
+
+
+def _log_command_start(cmd: list[str], working_dir: str | None) -> None:
+    """Log the command about to run and its working directory."""
+    logger.info(f"Running command: {' '.join(cmd)}")
+    if working_dir:
+        logger.info(f"Working directory: {working_dir}")
+
+
+def _log_command_output(stdout: str | bytes, stderr: str | bytes, returncode: int) -> None:
+    """Log a finished command's output and exit code."""
+    if stdout:
+        logger.info(f"Command stdout:\n{_as_text(stdout)}")
+    if stderr:
+        logger.info(f"Command stderr:\n{_as_text(stderr)}")
+    logger.info(f"Command exit code: {returncode}")
+
+
 def run_command(
     cmd: list[str],
     cwd: str | Path | None = None,
@@ -46,20 +78,10 @@ def run_command(
         CompletedProcess result
     """
     working_dir = str(cwd) if cwd else None
-
-    # Prepare environment
-    if clean_env:
-        env = get_clean_env()
-    else:
-        env = os.environ.copy()
-
-    if extra_env:
-        env.update(extra_env)
+    env = _command_env(clean_env, extra_env)
 
     if debug:
-        logger.info(f"Running command: {' '.join(cmd)}")
-        if working_dir:
-            logger.info(f"Working directory: {working_dir}")
+        _log_command_start(cmd, working_dir)
 
     try:
         result = subprocess.run(
@@ -67,11 +89,7 @@ def run_command(
         )
 
         if debug and capture_output:
-            if result.stdout:
-                logger.info(f"Command stdout:\n{result.stdout}")
-            if result.stderr:
-                logger.info(f"Command stderr:\n{result.stderr}")
-            logger.info(f"Command exit code: {result.returncode}")
+            _log_command_output(result.stdout, result.stderr, result.returncode)
 
         return result
 
@@ -115,7 +133,7 @@ def run_git_command(
 
 
 def run_ce_install_command(
-    subcommand: list[str], cwd: str | Path, debug: bool = False
+    subcommand: list[str], cwd: str | Path, debug: bool = False, text: bool = True
 ) -> subprocess.CompletedProcess:
     """
     Run a ce_install command with clean environment.
@@ -124,12 +142,62 @@ def run_ce_install_command(
         subcommand: ce_install subcommand and arguments (without 'bin/ce_install')
         cwd: Working directory (should be infra repo path)
         debug: Whether to log debug information
+        text: Whether to decode output to str (False leaves stdout/stderr as bytes)
 
     Returns:
         CompletedProcess result
     """
     cmd = ["bin/ce_install"] + subcommand
-    return run_command(cmd, cwd=cwd, clean_env=True, debug=debug)
+    return run_command(cmd, cwd=cwd, text=text, clean_env=True, debug=debug)
+
+
+def run_ce_install_command_streaming(
+    subcommand: list[str],
+    cwd: str | Path,
+    on_line: Callable[[str], None],
+    debug: bool = False,
+) -> int:
+    """
+    Run a ce_install command with clean environment, handing output to a callback.
+
+    stdout and stderr are merged and passed to on_line one line at a time as the
+    command runs, so long outputs are never held in memory as a whole.
+
+    Args:
+        subcommand: ce_install subcommand and arguments (without 'bin/ce_install')
+        cwd: Working directory (should be infra repo path)
+        on_line: Called with each output line (including its newline)
+        debug: Whether to log debug information
+
+    Returns:
+        The command's exit code
+    """
+    cmd = ["bin/ce_install"] + subcommand
+    working_dir = str(cwd)
+
+    if debug:
+        _log_command_start(cmd, working_dir)
+
+    # Output is only kept whole when it is going to be logged
+    logged_lines: list[str] = []
+    with subprocess.Popen(
+        cmd,
+        cwd=working_dir,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        errors="replace",
+        env=_command_env(clean_env=True, extra_env=None),
+    ) as proc:
+        for line in proc.stdout:
+            if debug:
+                logged_lines.append(line)
+            on_line(line)
+
+    if debug:
+        _log_command_output("".join(logged_lines), "", proc.returncode)
+
+    return proc.returncode
 
 
 def run_make_command(
@@ -0,0 +1,29 @@
+"""Tests for core.build_tester."""
+import pytest
+
+from core.build_tester import parse_semver
+
+
+@pytest.mark.parametrize(
+    ("version", "expected"),
+    [
+        ("14.2.0", (14, 2, 0)),
+        ("14.2", (14, 2, 0)),
+        ("14", (14, 0, 0)),
+        ("v14.2.0", (14, 2, 0)),
+        ("1.2.3.4", (1, 2, 3)),
+        # Every leading 'v' is stripped
+        ("vv14", (14, 0, 0)),
+        # A field with non-digits counts as 0 without ending the parse
+        ("1x.2", (0, 2, 0)),
+        ("14.2rc.1", (14, 0, 1)),
+        # Trailing junk on a field zeroes that field only
+        ("14abc", (0, 0, 0)),
+        ("14.2.1rc", (14, 2, 0)),
+        ("14.2.0-rc1", (14, 2, 0)),
+        ("", (0, 0, 0)),
+        ("trunk", (0, 0, 0)),
+    ],
+)
+def test_parse_semver(version, expected):
+    assert parse_semver(version) == expected